@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+Benchmarks of YDbf reader.
+
+Creates temporary DBF file with some fixed structure and measures
+time of reading it in different ways.
+
+Usage: benchmark.py [number_of_records]
+"""
+
+from __future__ import print_function
+
+import datetime
+import decimal
+import os
+import sys
+import tempfile
+import time
+
+import ydbf
+from ydbf import index
+from ydbf import query
+
+FIELDS = (
+    ("ID", ydbf.NUMERAL, 10, 0),
+    ("NAME", ydbf.CHAR, 30, 0),
+    ("AMOUNT", ydbf.NUMERAL, 15, 2),
+    ("UPDATED", ydbf.DATE, 8, 0),
+    ("ACTIVE", ydbf.LOGICAL, 1, 0),
+)
+
+
+def get_data(number_of_records):
+    start = datetime.date(2000, 1, 1)
+    for i in range(number_of_records):
+        yield {
+            "ID": i,
+            "NAME": "name %d" % (i % 1000),
+            "AMOUNT": decimal.Decimal(i * 7 % 100000) / 100,
+            "UPDATED": start + datetime.timedelta(days=i % 5000),
+            "ACTIVE": bool(i % 3),
+        }
+
+
+def closure_chain(dbf):
+    """
+    Converting records by looping over converters of fields
+    (the way records() worked before compiled decoders)
+    """
+    converters = tuple(
+        (dbf.converters[name], name, size, dec) for name, typ, size, dec in dbf._fields
+    )
+    for i, record in dbf._rawRecords(0, dbf.numrec):
+        if record[0] != b" ":
+            continue
+        yield dict(
+            (name, conv(val.rstrip(b"\x00"), size, dec))
+            for (conv, name, size, dec), val in zip(converters, record)
+            if name != "_deletion_flag"
+        )
+
+
+def records(dbf):
+    return dbf.records()
+
+
+def tuples(dbf):
+    return dbf.records(row_type="tuple")
+
+
+def lazy(dbf):
+    return (rec["ID"] for rec in dbf.records(lazy=True))
+
+
+def columns(dbf):
+    return [dbf.read_columns()]
+
+
+def count_live(dbf):
+    return [dbf.count_live()]
+
+
+def tail(dbf):
+    return dbf.tail(100)
+
+
+def scan_by_name(dbf):
+    return dbf.records(where=query.eq("NAME", "name 123"))
+
+
+def lookup_by_name(dbf):
+    return dbf.lookup("NAME", "name 123")
+
+
+def projection(dbf):
+    return dbf.records(fields=["ID", "AMOUNT"])
+
+
+def float_amounts(dbf):
+    """
+    Converting money column via float
+    (the way decimals were converted before exact decoder)
+    """
+    for rec in dbf.records(fields=["AMOUNT"]):
+        yield decimal.Decimal("%.2f" % rec["AMOUNT"])
+
+
+def amounts(dbf):
+    return dbf.records(fields=["AMOUNT"])
+
+
+def total_loop(dbf):
+    total = 0
+    for rec in dbf:
+        total += rec["AMOUNT"]
+    return [total]
+
+
+def total_aggregate(dbf):
+    return [dbf.aggregate({"AMOUNT": "sum", "ID": "max", "*": "count"})]
+
+
+def group_loop(dbf):
+    totals = {}
+    for rec in dbf:
+        key = (rec["NAME"], rec["ACTIVE"])
+        totals[key] = totals.get(key, 0) + rec["AMOUNT"]
+    return totals.items()
+
+
+def group_by(dbf):
+    return query.group_by(dbf, ["NAME", "ACTIVE"], {"AMOUNT": "sum"})
+
+
+CASES = (
+    ("closure chain", {}, closure_chain),
+    ("records()", {}, records),
+    ("records(), mmap", {"use_mmap": True}, records),
+    ("records(), stats", {"stats": True}, records),
+    ("records(), tuples", {}, tuples),
+    ("records(), cached converters", {"cache_size": 8192}, records),
+    ("records(), categorical NAME", {"categorical": ["NAME"]}, records),
+    ("records(), 2 of 5 fields", {}, projection),
+    ("records(), lazy, 1 of 5 fields", {}, lazy),
+    ("read_columns()", {}, columns),
+    ("count_live()", {}, count_live),
+    ("count_live(), mmap", {"use_mmap": True}, count_live),
+    ("tail(100)", {}, tail),
+    ("records(where=eq(NAME))", {}, scan_by_name),
+    ("lookup(NAME), index", {}, lookup_by_name),
+    ("money via float", {"numeric_mode": "float"}, float_amounts),
+    ("money, decimal", {}, amounts),
+    ("money, scaled int", {"numeric_mode": "int"}, amounts),
+    ("money, float", {"numeric_mode": "float"}, amounts),
+    ("total, loop over records", {}, total_loop),
+    ("total, aggregate()", {}, total_aggregate),
+    ("groups, loop over records", {}, group_loop),
+    ("groups, group_by()", {}, group_by),
+)
+
+
+def measure(filename, options, reader, repeat=3):
+    best = None
+    for _ in range(repeat):
+        with ydbf.open(filename, **options) as dbf:
+            started = time.time()
+            for _ in reader(dbf):
+                pass
+            elapsed = time.time() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(args):
+    number_of_records = int(args[0]) if args else 100000
+    _, filename = tempfile.mkstemp(suffix=".dbf")
+    try:
+        with ydbf.open(filename, ydbf.WRITE, FIELDS) as dbf:
+            dbf.write(get_data(number_of_records))
+        index.build(filename, "NAME")
+        print("%d records, best of 3:" % number_of_records)
+        baseline = None
+        for title, options, reader in CASES:
+            elapsed = measure(filename, options, reader)
+            if baseline is None:
+                baseline = elapsed
+            print("  %-32s %.3fs (%.2fx)" % (title, elapsed, baseline / elapsed))
+    finally:
+        os.unlink(filename)
+        if os.path.exists(index.index_path(filename, "NAME")):
+            os.unlink(index.index_path(filename, "NAME"))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -36,6 +36,9 @@ setup(
     include_package_data=True,
     zip_safe=True,
     install_requires=[],
+    extras_require={
+        "numpy": ["numpy"],
+    },
     entry_points="""
       # -*- Entry points: -*-
       [console_scripts]
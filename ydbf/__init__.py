@@ -57,6 +57,7 @@ YDbf offers the field types as constants:
  - ydbf.DATE
  - ydbf.LOGICAL
  - ydbf.NUMERAL
+ - ydbf.MEMO (reading mode only, see ydbf.memo)
 
 An example of the fields definition:
 
@@ -103,9 +104,11 @@ import builtins
 from ydbf.lib import CHAR
 from ydbf.lib import DATE
 from ydbf.lib import LOGICAL
+from ydbf.lib import MEMO
 from ydbf.lib import NUMERAL
 
 
+from ydbf import compression as ydbf_compression
 from ydbf.reader import YDbfReader
 from ydbf.writer import YDbfWriter
 
@@ -118,7 +121,7 @@ FILE_MODES = {
 }
 
 
-def open(dbf_file, mode=READ, *args, **kwargs):
+def open(dbf_file, mode=READ, *args, compression="auto", **kwargs):
     """
     Open DBF for reading or writing
 
@@ -140,10 +143,66 @@ def open(dbf_file, mode=READ, *args, **kwargs):
         `encoding`:
             Set encoding of DBF file, most
             useful for writing mode.
+
+        `use_mmap`:
+            Map file into memory instead of reading
+            records one by one (reading mode only).
+
+        `block_size`:
+            Size of block (in bytes) which is read at once
+            (reading mode only), 4 MiB by default.
+
+        `numeric_mode`:
+            Conversion of numerals with decimal digits: "decimal"
+            (default), "int" (ints scaled by number of decimal digits)
+            or "float", for all fields or as dict {NAME: mode}
+            (reading mode only).
+
+        `cache_size`:
+            Size of LRU cache of converted date and char values,
+            for all such fields or as dict {NAME: size}, no caches
+            by default (reading mode only).
+
+        `categorical`:
+            Names of char fields which are converted to integer codes,
+            values of codes are in `categories` attribute of reader
+            (reading mode only).
+
+        `streaming`:
+            Read file as forward-only stream without seeks, used
+            by default for non-seekable files like pipes or stdin
+            (reading mode only).
+
+        `compression`:
+            Compression of file: 'gzip', 'bz2', 'xz', 'zip' or None.
+            By default ('auto') it is detected by magic bytes (reading
+            mode) or by extension (writing mode) of file name, file-like
+            objects are considered as not compressed. Compressed files
+            are read in streaming mode (see `ydbf.compression`).
+
+        `stats`, `stats_callback`:
+            Collect statistics of reading or writing (see `ydbf.stats`),
+            off by default.
+
+        `memo_file`, `memo_cache_size`:
+            Memo file (.dbt or .fpt) of memo fields, by default it is
+            looked up next to DBF file, and size of its cache of memos
+            (reading mode only, see `ydbf.memo`).
     """
     if mode not in FILE_MODES:
         raise ValueError("Wrong mode %s for ydbf.open" % mode)
     dbf_class = FILE_MODES[mode]
+    if compression == "auto":
+        compression = None
+        if isinstance(dbf_file, str):
+            compression = ydbf_compression.detect(dbf_file, mode)
+    if compression and mode == READ:
+        fh = ydbf_compression.open_read(dbf_file, compression)
+        kwargs.setdefault("streaming", True)
+        return dbf_class(fh, *args, **kwargs)
+    elif compression:
+        fh = ydbf_compression.open_write(dbf_file, compression)
+        return dbf_class(fh, *args, **kwargs)
     if isinstance(dbf_file, str):
         fh = builtins.open(dbf_file, "{mode}b".format(mode=mode))
         return dbf_class(fh, *args, **kwargs)
@@ -0,0 +1,351 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+Aggregation of numeric fields
+
+Aggregates are computed over raw values of fields, records are not
+converted to dicts: numerals are parsed to ints scaled by number of
+decimal digits and the result is converted once at the end:
+
+    with ydbf.open('big.dbf') as dbf:
+        totals = dbf.aggregate({'AMOUNT': 'sum', 'ID': 'max', '*': 'count'})
+
+Aggregate of field is one of `AGGREGATES` or tuple of them, '*' is
+counted only. Result is dict with the same keys, sum, min, max and avg
+of numerals with decimal digits are converted by `numeric_mode` of
+reader (avg is Decimal in 'decimal' mode and float otherwise), empty
+numerals are 0, null values (Visual FoxPro) are skipped, min, max and
+avg of no records are None.
+
+States of ranges of records can be computed separately and merged,
+so aggregates run in parallel as well (see `ydbf.parallel.aggregate`).
+"""
+
+import operator
+from decimal import Decimal
+
+import ydbf
+from ydbf import lib
+from ydbf import query
+
+SUM = "sum"
+MIN = "min"
+MAX = "max"
+COUNT = "count"
+AVG = "avg"
+
+AGGREGATES = (SUM, MIN, MAX, COUNT, AVG)
+
+# Key of aggregates spec which counts records
+ALL = "*"
+
+# Types of fields which can be aggregated
+NUMERIC_TYPES = (
+    lib.NUMERAL,
+    lib.FLOAT,
+    lib.INTEGER,
+    lib.DOUBLE,
+    lib.CURRENCY,
+)
+
+
+class State(object):
+    """
+    Partial aggregates of field over some records
+    """
+
+    __slots__ = ("count", "sum", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def update(self, values):
+        """
+        Add list of parsed values
+        """
+        if not values:
+            return
+        self.count += len(values)
+        self.sum += sum(values)
+        low, high = min(values), max(values)
+        if self.min is None or low < self.min:
+            self.min = low
+        if self.max is None or high > self.max:
+            self.max = high
+
+    def merge(self, other):
+        """
+        Add partial aggregates of other records
+        """
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def __getstate__(self):
+        return (self.count, self.sum, self.min, self.max)
+
+    def __setstate__(self, state):
+        self.count, self.sum, self.min, self.max = state
+
+    def __repr__(self):
+        return "State(count=%r, sum=%r, min=%r, max=%r)" % self.__getstate__()
+
+
+def normalize(spec):
+    """
+    Check aggregates `spec`, returns list of (key, tuple of aggregates)
+    """
+    items = []
+    for key, aggregates in spec.items():
+        if isinstance(aggregates, str):
+            aggregates = (aggregates,)
+        aggregates = tuple(aggregates)
+        for aggregate in aggregates:
+            if aggregate not in AGGREGATES:
+                raise ValueError(
+                    "Unknown aggregate %r of %s, should be one of %s"
+                    % (aggregate, key, ", ".join(AGGREGATES))
+                )
+            if key == ALL and aggregate != COUNT:
+                raise ValueError("Records ('*') can be counted only")
+        items.append((key, aggregates))
+    return items
+
+
+_drop_point = operator.methodcaller("replace", b".", b"")
+
+
+def column_parser(reader, name):
+    """
+    Make function which parses list of raw values of numeric field
+    `name` to list of ints (scaled by number of decimal digits) or
+    floats (doubles)
+    """
+    field = query._field_spec(reader, name)
+    name, typ, size, dec = field
+    if typ not in NUMERIC_TYPES:
+        raise ValueError(
+            "Cannot aggregate field %s of type %s, only numeric fields "
+            "are supported" % (name, typ)
+        )
+    parse = query._raw_key(field)
+    if typ not in (lib.NUMERAL, lib.FLOAT):
+        return lambda column: list(map(parse, column))
+    point = size - dec - 1
+
+    def parse_column(column):
+        # the most common case: all values are right-aligned with exactly
+        # `dec` decimal digits, so int() parses them without the point
+        try:
+            if not dec:
+                return list(map(int, column))
+            joined = b"".join(column)
+            if joined[point::size].count(b".") == len(column) and all(
+                joined[pos::size].isdigit() for pos in range(point + 1, size)
+            ):
+                return list(map(int, map(_drop_point, column)))
+        except ValueError:
+            pass
+        return list(map(parse, column))
+
+    return parse_column
+
+
+def _decimals(field):
+    if field[1] == lib.CURRENCY:
+        return lib.CURRENCY_DECIMALS
+    return field[3]
+
+
+def finish(reader, key, aggregates, state):
+    """
+    Convert partial aggregates `state` of field `key` to result
+    of `aggregates` (tuple of results or single result)
+    """
+    results = []
+    if key == ALL:
+        results = [state.count for aggregate in aggregates]
+    else:
+        field = query._field_spec(reader, key)
+        dec = _decimals(field)
+        mode = reader._numericMode(key) if dec else "int"
+        if field[1] == lib.DOUBLE:
+            mode = "float"
+            dec = 0
+        for aggregate in aggregates:
+            results.append(_result(aggregate, state, dec, mode))
+    if len(results) == 1:
+        return results[0]
+    return tuple(results)
+
+
+def _result(aggregate, state, dec, mode):
+    if aggregate == COUNT:
+        return state.count
+    if aggregate == AVG:
+        if not state.count:
+            return None
+        if mode == "decimal":
+            return (Decimal(state.sum) / state.count).scaleb(-dec)
+        if mode == "float":
+            return state.sum / state.count / 10**dec
+        # scaled as values in 'int' mode
+        return state.sum / state.count
+    value = {SUM: state.sum, MIN: state.min, MAX: state.max}[aggregate]
+    if value is None or mode == "int":
+        return value
+    if mode == "decimal":
+        return Decimal(value).scaleb(-dec)
+    return value / 10**dec
+
+
+def raw_chunks(reader, fields, where=None, start=0, stop=None):
+    """
+    Get blocks of live raw records [start, stop) of `reader` which
+    match `where`, only `fields` (and fields of `where`) are unpacked
+
+    Returns names of values in raw records and iterator over lists
+    of raw records.
+    """
+    if stop is None:
+        stop = reader.numrec
+    unpacked = set(fields)
+    if where is not None:
+        unpacked |= set(query.where_fields(where))
+    unpacked = reader._withNullFlags(unpacked)
+    recfmt = reader._projectionFormat(unpacked)
+    names = reader._unpackedNames(unpacked)
+    match = None
+    if where is not None:
+        match = query.compile_where(where, reader, names)
+    blocks = reader._rawBlocks(start, stop, recfmt)
+    return names, _live_chunks(reader, blocks, start, match)
+
+
+def _live_chunks(reader, blocks, start, match=None):
+    first = start  # number of the first record of block
+    for block in blocks:
+        if match is None:
+            chunk = [record for record in block if record[0] == b" "]
+        else:
+            chunk = _matching(reader, block, first, match)
+        first += len(block)
+        if chunk:
+            yield chunk
+
+
+def _matching(reader, block, first, match):
+    # live records of block which match, errors are reported with
+    # number of record the same way as in `YDbfReader.records`
+    chunk = []
+    for recno, record in enumerate(block, first):
+        if record[0] != b" ":
+            continue
+        try:
+            if match(record):
+                chunk.append(record)
+        except ydbf.reader.CONVERSION_ERRORS as err:
+            raise reader._conversionError(err, recno)
+    return chunk
+
+
+def parse_columns(parsers, chunk):
+    """
+    Parse values of (name, getter, column parser, null) `parsers`
+    of raw records `chunk`, returns list of columns (null values
+    are None)
+    """
+    columns = []
+    for name, get, parse, null in parsers:
+        try:
+            column = parse(list(map(get, chunk)))
+        except ValueError as err:
+            raise RuntimeError(
+                "Error occured (%s: %s) while aggregating field %s"
+                % (err.__class__.__name__, err, name)
+            )
+        if null is not None:
+            _set_nulls(column, chunk, null)
+        columns.append(column)
+    return columns
+
+
+def _set_nulls(column, chunk, null):
+    get_flags, bit = null
+    for pos, record in enumerate(chunk):
+        if int.from_bytes(get_flags(record), "little") >> bit & 1:
+            column[pos] = None
+
+
+def column_parsers(reader, fields, names):
+    """
+    Make (name, getter, column parser, null) of `fields` for raw records
+    with values of `names`, where `null` is (getter of null flags, bit)
+    of nullable field or None
+    """
+    parsers = []
+    for name in fields:
+        null = None
+        if name in reader.null_bits and reader._null_flags in names:
+            get_flags = operator.itemgetter(names.index(reader._null_flags))
+            null = (get_flags, reader.null_bits[name])
+        get = operator.itemgetter(names.index(name))
+        parsers.append((name, get, column_parser(reader, name), null))
+    return parsers
+
+
+def scan(reader, spec, where=None, start=0, stop=None):
+    """
+    Compute partial aggregates of records [start, stop) of `reader`,
+    returns dict where keys are keys of `spec` and values are `State`
+    """
+    fields = [key for key, aggregates in normalize(spec) if key != ALL]
+    names, chunks = raw_chunks(reader, fields, where, start, stop)
+    parsers = column_parsers(reader, fields, names)
+    states = dict((key, State()) for key in fields)
+    total = State()
+    for chunk in chunks:
+        total.count += len(chunk)
+        columns = parse_columns(parsers, chunk)
+        for (name, get, parse, null), column in zip(parsers, columns):
+            if null is not None:
+                column = [value for value in column if value is not None]
+            states[name].update(column)
+    states[ALL] = total
+    return states
+
+
+def merge(states, other):
+    """
+    Merge partial aggregates `other` into `states`
+    """
+    for key, state in other.items():
+        states[key].merge(state)
+    return states
+
+
+def results(reader, spec, states):
+    """
+    Convert partial aggregates to results of `spec`
+    """
+    return dict(
+        (key, finish(reader, key, aggregates, states[key]))
+        for key, aggregates in normalize(spec)
+    )
+
+
+def aggregate(reader, spec, where=None, start=0, stop=None):
+    """
+    Compute aggregates `spec` of records [start, stop) of `reader`
+    """
+    return results(reader, spec, scan(reader, spec, where, start, stop))
@@ -0,0 +1,163 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+NumPy views and vectorized converters of DBF data
+
+Requires numpy (install YDbf with 'numpy' extra). Since DBF records have
+fixed width, the data section of file is a numpy array with structured
+dtype, where each field is a bytes (S<size>) column (binary fields
+of Visual FoxPro are int32, float64 or int64 columns):
+
+    raw = dbf.to_numpy_raw()
+    amounts = arrays.numerals(raw['AMOUNT'], 2)
+    total = amounts[arrays.live(raw)].sum()
+
+The raw array is a view over memory-mapped file, no data is copied
+until some column is converted.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ydbf import lib
+
+_TRUE_LOGICALS = (b"Y", b"y", b"T", b"t")
+
+# Ordinal of 1970-01-01, start of datetime64
+_EPOCH_ORDINAL = 719163
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError(
+            "numpy is required for ydbf.arrays, install it or "
+            "install YDbf with 'numpy' extra"
+        )
+
+
+def raw_dtype(reader):
+    """
+    Make structured dtype of record of `reader`
+    """
+    _require_numpy()
+    return numpy.dtype(
+        [
+            (name, "<" + (lib.binary_format(typ, size) or "S%d" % size))
+            for name, typ, size, dec in reader._fields
+        ]
+    )
+
+
+def to_numpy_raw(reader):
+    """
+    Make array of raw records of `reader` over memory-mapped file
+
+    Deleted records are included, use `live` to filter them out.
+    """
+    _require_numpy()
+    if reader.mm is None:
+        reader._mapFile()
+    return numpy.frombuffer(
+        reader.mm, dtype=raw_dtype(reader), count=reader.numrec, offset=reader.lenheader
+    )
+
+
+def live(raw):
+    """
+    Boolean mask of records which are not deleted
+    """
+    _require_numpy()
+    return raw["_deletion_flag"] == b" "
+
+
+def numerals(column, dec=0):
+    """
+    Convert raw numeral column to int64 (if `dec` is 0) or float64 array,
+    empty values are converted to 0
+    """
+    _require_numpy()
+    stripped = numpy.char.strip(column)
+    stripped = numpy.where(stripped == b"", b"0", stripped)
+    return stripped.astype(numpy.float64 if dec else numpy.int64)
+
+
+def dates(column):
+    """
+    Convert raw date column to datetime64[D] array,
+    empty and wrong dates are converted to NaT
+    """
+    _require_numpy()
+    raw = numpy.ascontiguousarray(column, dtype="S8")
+    digits = raw.view(numpy.uint8).reshape(-1, 8).astype(numpy.int64) - ord("0")
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    digits = numpy.where(valid[:, None], digits, 0)
+    year = digits[:, :4].dot([1000, 100, 10, 1])
+    month = digits[:, 4:6].dot([10, 1])
+    day = digits[:, 6:].dot([10, 1])
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    result = (year - 1970).astype("datetime64[Y]")
+    result = result + (month - 1).astype("timedelta64[M]")
+    result = result.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    # day out of month (e.g. 20060231) rolls over to the next month,
+    # such dates are wrong, as well as year 0 (see lib.dbf2date)
+    months = result.astype("datetime64[M]").astype(numpy.int64) % 12
+    valid &= (months == month - 1) & (year >= 1)
+    result[~valid] = numpy.datetime64("NaT")
+    return result
+
+
+def ordinals(column):
+    """
+    Convert sequence of date ordinals (see `datetime.date.toordinal`)
+    to datetime64[D] array, zero ordinals are converted to NaT
+    """
+    _require_numpy()
+    days = numpy.array(column, dtype=numpy.int64)
+    result = (days - _EPOCH_ORDINAL).astype("datetime64[D]")
+    result[days == 0] = numpy.datetime64("NaT")
+    return result
+
+
+def logicals(column):
+    """
+    Convert raw logical column to bool array
+    """
+    _require_numpy()
+    return numpy.isin(column, _TRUE_LOGICALS)
+
+
+def convert(reader, raw, fields=None):
+    """
+    Convert columns of `raw` array to numpy arrays
+
+    Numerals, dates and logicals are converted with `numerals`,
+    `dates` and `logicals`, chars are returned as raw bytes columns.
+    Returns dict where keys are names of fields.
+
+    Args:
+        `reader`:
+            YDbfReader instance, `raw` is made from
+        `raw`:
+            array of raw records (see `to_numpy_raw`)
+        `fields`:
+            names of fields to convert, all fields by default
+    """
+    result = {}
+    for name, typ, size, dec in reader.fields:
+        if fields is not None and name not in fields:
+            continue
+        if typ in (lib.NUMERAL, lib.FLOAT):
+            result[name] = numerals(raw[name], dec)
+        elif typ == lib.DATE:
+            result[name] = dates(raw[name])
+        elif typ == lib.LOGICAL:
+            result[name] = logicals(raw[name])
+        else:
+            result[name] = raw[name]
+    return result
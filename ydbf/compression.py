@@ -0,0 +1,241 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+Compressed DBF files
+
+Supported compressions are gzip, bz2, xz and zip (DBF should be
+the only file or the first .dbf file of archive). `ydbf.open`
+detects compression by magic bytes of file (reading mode) or by
+extension of file name (writing mode):
+
+    with ydbf.open('archive/2009.dbf.gz') as dbf:
+        for rec in dbf:
+            ...
+
+Compressed DBF is read as forward-only stream (see `streaming` option
+of `YDbfReader`), so it is never decompressed to disk. Writer needs to
+update header after records are written, so DBF is written to spooled
+temporary file and compressed on close.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+
+GZIP = "gzip"
+BZ2 = "bz2"
+XZ = "xz"
+ZIP = "zip"
+
+COMPRESSIONS = (GZIP, BZ2, XZ, ZIP)
+
+MAGIC_BYTES = (
+    (GZIP, b"\x1f\x8b"),
+    (BZ2, b"BZh"),
+    (XZ, b"\xfd7zXZ\x00"),
+    (ZIP, b"PK\x03\x04"),
+)
+
+EXTENSIONS = {
+    ".gz": GZIP,
+    ".bz2": BZ2,
+    ".xz": XZ,
+    ".zip": ZIP,
+}
+
+# Size of temporary file kept in memory while compressed DBF is written
+DEFAULT_SPOOL_SIZE = 16 * 1024 * 1024
+
+# Size of chunks copied from temporary file to compressor
+_COPY_SIZE = 1024 * 1024
+
+# Member of zip archive can be opened for writing since Python 3.6
+_ZIP_STREAMING = sys.version_info >= (3, 6)
+
+
+def detect(filename, mode="r"):
+    """
+    Detect compression of file `filename`, returns one of
+    `COMPRESSIONS` or None if file isn't compressed
+
+    In reading mode compression is detected by magic bytes
+    of file, in writing mode -- by extension of file name.
+    """
+    if mode == "r":
+        with open(filename, "rb") as fh:
+            head = fh.read(8)
+        for compression, magic in MAGIC_BYTES:
+            if head.startswith(magic):
+                return compression
+        return None
+    return EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+
+
+def _check_compression(compression):
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            "Unknown compression %s, should be one of %s"
+            % (compression, ", ".join(COMPRESSIONS))
+        )
+
+
+def _zip_member(archive):
+    """
+    Name of DBF in zip `archive`
+    """
+    names = archive.namelist()
+    for name in names:
+        if name.lower().endswith(".dbf"):
+            return name
+    if len(names) != 1:
+        raise ValueError("Cannot find DBF in zip archive %s" % archive.filename)
+    return names[0]
+
+
+def open_read(dbf_file, compression):
+    """
+    Open compressed DBF for reading, returns file-like object
+    of decompressed data
+
+    Args:
+        `dbf_file`:
+            file name or file-like object
+        `compression`:
+            one of `COMPRESSIONS`
+    """
+    _check_compression(compression)
+    if compression == GZIP:
+        return gzip.open(dbf_file, "rb")
+    if compression == BZ2:
+        return bz2.open(dbf_file, "rb")
+    if compression == XZ:
+        return lzma.open(dbf_file, "rb")
+    archive = zipfile.ZipFile(dbf_file)
+    try:
+        # member keeps archive file open until it is closed itself
+        return archive.open(_zip_member(archive))
+    finally:
+        archive.close()
+
+
+class CompressingFile(object):
+    """
+    File-like object which writes data to spooled temporary file and
+    compresses it to target file on close
+    """
+
+    def __init__(self, dbf_file, compression, spool_size=DEFAULT_SPOOL_SIZE):
+        """
+        Args:
+            `dbf_file`:
+                file name or file-like object of compressed DBF
+            `compression`:
+                one of `COMPRESSIONS`
+            `spool_size`:
+                max size of temporary file kept in memory
+        """
+        _check_compression(compression)
+        self.dbf_file = dbf_file
+        self.compression = compression
+        self.spool = tempfile.SpooledTemporaryFile(spool_size)
+
+    def __getattr__(self, name):
+        # write, seek, tell, flush, etc
+        return getattr(self.spool, name)
+
+    @property
+    def closed(self):
+        return self.spool.closed
+
+    def _compressor(self):
+        if self.compression == GZIP:
+            return gzip.open(self.dbf_file, "wb")
+        if self.compression == BZ2:
+            return bz2.open(self.dbf_file, "wb")
+        if self.compression == XZ:
+            return lzma.open(self.dbf_file, "wb")
+        return _ZipWriter(self.dbf_file)
+
+    def close(self):
+        """
+        Compress written data to target file and close temporary file
+        """
+        if self.spool.closed:
+            return
+        try:
+            self.spool.seek(0)
+            with self._compressor() as target:
+                shutil.copyfileobj(self.spool, target, _COPY_SIZE)
+        finally:
+            self.spool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class _ZipWriter(object):
+    """
+    Writer of the only member of zip archive, name of member is
+    name of archive without .zip extension (with .dbf extension added
+    if it is missing)
+
+    Member is written as a stream on Python 3.6+, Python 3.5 can't
+    open member of zip archive for writing, so data of member is
+    collected in memory and written on exit.
+    """
+
+    def __init__(self, dbf_file):
+        self.archive = zipfile.ZipFile(dbf_file, "w", zipfile.ZIP_DEFLATED)
+        name = dbf_file if isinstance(dbf_file, str) else getattr(dbf_file, "name", "")
+        name = os.path.basename(name) if isinstance(name, str) else ""
+        if name.lower().endswith(".zip"):
+            name = name[:-4]
+        if name and not name.lower().endswith(".dbf"):
+            name += ".dbf"
+        self.name = name or "data.dbf"
+        if _ZIP_STREAMING:
+            self.member = self.archive.open(self.name, "w")
+        else:
+            self.member = io.BytesIO()
+
+    def write(self, data):
+        return self.member.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if not _ZIP_STREAMING:
+                self.archive.writestr(self.name, self.member.getvalue())
+            self.member.close()
+        finally:
+            self.archive.close()
+
+
+def open_write(dbf_file, compression, spool_size=DEFAULT_SPOOL_SIZE):
+    """
+    Open compressed DBF for writing, returns `CompressingFile`
+
+    Args:
+        `dbf_file`:
+            file name or file-like object
+        `compression`:
+            one of `COMPRESSIONS`
+        `spool_size`:
+            max size of temporary file kept in memory
+    """
+    return CompressingFile(dbf_file, compression, spool_size)
@@ -85,7 +85,9 @@ def parse_options(args):
     """
     Parse options
     """
-    parser = OptionParser(usage="%prog [options] files", version="%%prog %s" % VERSION)
+    parser = OptionParser(
+        usage="%prog [options] files (- for stdin)", version="%%prog %s" % VERSION
+    )
     parser.add_option(
         "-r",
         "--rs",
@@ -256,7 +258,7 @@ def dbf_data(fh, fields=None):
         # all fields
         fields_spec = reader.fields
         fields = [f[0] for f in reader.fields]
-    generator = _flatten_data(reader.records(), fields)
+    generator = _flatten_data(reader.records(fields=fields), fields)
     return fields_spec, generator
 
 
@@ -282,7 +284,11 @@ def dump(args):
     if options.info:
         return show_info(args, ofh)
     for filename in args:
-        fh = open(filename, "rb")
+        if filename == "-":
+            # DBF from pipe, read in streaming mode
+            fh = sys.stdin.buffer
+        else:
+            fh = open(filename, "rb")
         fields_spec, data_iterator = dbf_data(fh, options.fields)
         data_iterator = replace_null(data_iterator, options.undef)
         if options.table:
@@ -0,0 +1,237 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+Sidecar key indexes of DBF files
+
+Index of field is a separate file (by default '<DBF file>.<FIELD>.ydx')
+with keys of field sorted together with numbers of records, so records
+are looked up by binary search and read by their numbers:
+
+    index.build('big.dbf', 'ACCOUNT')
+
+    with ydbf.open('big.dbf') as dbf:
+        records = dbf.lookup('ACCOUNT', '40817810')
+        for rec in dbf.range('UPDATED', datetime.date(2009, 1, 1), None):
+            ...
+
+Format of index file is a header (see `HEADER_FORMAT`) and sorted
+entries of fixed size: key (KEYSIZE bytes) and big-endian number of
+record (4 bytes). Keys are raw bytes of field which compare the same
+way as values: chars are padded by spaces, numerals are integers scaled
+by number of decimal digits (8 bytes, big-endian with flipped sign bit),
+dates are YYYYMMDD, logicals are T or F. Deleted records, empty dates
+and wrong numerals are not indexed. Index file is memory-mapped on use.
+"""
+
+import builtins
+import mmap
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+from struct import Struct, calcsize, pack, unpack_from
+
+import ydbf
+from ydbf import lib
+from ydbf import query
+
+MAGIC = b"YDBFIDX1"
+
+# Index header format
+# 8s  -- magic (YDBFIDX1)
+# 11s -- name of field
+# c   -- type of field
+# B   -- number of decimal digits of field
+# H   -- size of key
+# I   -- number of entries
+# I   -- number of records of DBF file at the moment of build
+HEADER_FORMAT = "<8s11scBHII"
+HEADER_SIZE = calcsize(HEADER_FORMAT)
+
+_NUMERAL_KEY = Struct(">Q")
+_NUMERAL_OFFSET = 1 << 63
+
+
+def index_path(dbf_path, field):
+    """
+    Default name of index file of `field` of DBF file `dbf_path`
+    """
+    return "%s.%s.ydx" % (dbf_path, field)
+
+
+def _key_size(typ, size):
+    if typ == lib.NUMERAL:
+        return _NUMERAL_KEY.size
+    return size
+
+
+def _numeral_key(value):
+    # values out of int64 range are clamped to its bounds
+    value = max(0, min(value + _NUMERAL_OFFSET, 2 * _NUMERAL_OFFSET - 1))
+    return _NUMERAL_KEY.pack(value)
+
+
+def raw_key(field, raw):
+    """
+    Make key of raw value of `field`, None if value is not indexed
+    """
+    name, typ, size, dec = field
+    raw = raw.rstrip(b"\x00")
+    if typ == lib.CHAR:
+        return raw.rstrip().ljust(size)
+    if typ == lib.NUMERAL:
+        try:
+            return _numeral_key(lib.dbf2scaled(raw, dec))
+        except ValueError:
+            return None
+    if typ == lib.DATE:
+        return raw if len(raw) == 8 and raw.isdigit() else None
+    if typ == lib.LOGICAL:
+        return b"T" if raw.strip() in query._TRUE_LOGICALS else b"F"
+    raise ValueError("Cannot index field %s (type %s)" % (name, typ))
+
+
+def value_key(reader, field, value, bound=None):
+    """
+    Make key of python `value` of `field`
+
+    If `bound` is None, returns None if there is no key equal to `value`
+    (e.g. too many decimal digits). If `bound` is 'low' or 'high' returns
+    key of the nearest value which is not less (for 'low') or not greater
+    (for 'high') than `value`.
+    """
+    name, typ, size, dec = field
+    key = query._value_key(reader, field, value)
+    if typ == lib.CHAR:
+        if bound is None and len(key) > size:
+            return None
+        return key.ljust(size)
+    if typ == lib.NUMERAL:
+        if isinstance(key, Decimal):
+            if bound is None:
+                return None
+            rounding = ROUND_CEILING if bound == "low" else ROUND_FLOOR
+            key = int(key.to_integral_value(rounding))
+        return _numeral_key(key)
+    if typ == lib.LOGICAL:
+        return b"T" if key else b"F"
+    return key
+
+
+def build(path, field, index_file=None, **reader_options):
+    """
+    Build index of `field` of DBF file `path`, returns name of index file
+
+    Args:
+        `path`:
+            name of DBF file
+        `field`:
+            name of field to index
+        `index_file`:
+            name of index file, `index_path(path, field)` by default
+        `reader_options`:
+            options for YDbfReader (e.g. `encoding`)
+    """
+    if index_file is None:
+        index_file = index_path(path, field)
+    with ydbf.YDbfReader(builtins.open(path, "rb"), **reader_options) as reader:
+        spec = query._field_spec(reader, field)
+        recfmt = reader._projectionFormat([field])
+        entries = []
+        for recno, (flag, raw) in reader._rawRecords(0, reader.numrec, recfmt):
+            if flag != b" ":
+                continue
+            key = raw_key(spec, raw)
+            if key is not None:
+                entries.append((key, recno))
+        numrec = reader.numrec
+    entries.sort()
+    name, typ, size, dec = spec
+    keysize = _key_size(typ, size)
+    entry = Struct(">%dsI" % keysize)
+    with builtins.open(index_file, "wb") as fh:
+        fh.write(
+            pack(
+                HEADER_FORMAT,
+                MAGIC,
+                name.encode(lib.SYSTEM_ENCODING),
+                typ.encode(lib.SYSTEM_ENCODING),
+                dec,
+                keysize,
+                len(entries),
+                numrec,
+            )
+        )
+        fh.writelines(entry.pack(key, recno) for key, recno in entries)
+    return index_file
+
+
+class Index(object):
+    """
+    Memory-mapped index file
+    """
+
+    def __init__(self, index_file):
+        with builtins.open(index_file, "rb") as fh:
+            self.mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, name, typ, dec, keysize, count, numrec = unpack_from(
+            HEADER_FORMAT, self.mm
+        )
+        if magic != MAGIC:
+            self.mm.close()
+            raise ValueError("%s is not a YDbf index file" % index_file)
+        self.index_file = index_file
+        self.field = name.rstrip(b"\x00").decode(lib.SYSTEM_ENCODING)
+        self.type = typ.decode(lib.SYSTEM_ENCODING)
+        self.dec = dec
+        self.keysize = keysize
+        self.count = count
+        self.numrec = numrec
+        self._entry_size = keysize + 4
+
+    def _key(self, i):
+        offset = HEADER_SIZE + i * self._entry_size
+        return self.mm[offset : offset + self.keysize]
+
+    def _recno(self, i):
+        offset = HEADER_SIZE + i * self._entry_size + self.keysize
+        return unpack_from(">I", self.mm, offset)[0]
+
+    def _bisect(self, key, right=False):
+        """
+        Find position of `key` among entries (bisect_left
+        or bisect_right if `right` is set)
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_key = self._key(middle)
+            if entry_key < key or (right and entry_key == key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def recnos(self, low=None, high=None):
+        """
+        Iterate over numbers of records with keys between `low` and
+        `high` (both inclusive, None means unbounded) in order of keys
+        """
+        start = 0 if low is None else self._bisect(low)
+        stop = self.count if high is None else self._bisect(high, right=True)
+        for i in range(start, stop):
+            yield self._recno(i)
+
+    def check(self, reader):
+        """
+        Check that index matches DBF of `reader`
+        """
+        spec = query._field_spec(reader, self.field)
+        if (spec[1], spec[3]) != (self.type, self.dec) or reader.numrec != self.numrec:
+            raise ValueError(
+                "Index %s doesn't match DBF file, rebuild it" % self.index_file
+            )
+
+    def close(self):
+        self.mm.close()
@@ -9,12 +9,56 @@ Common lib for both reader and writer
 """
 
 import datetime
+import struct
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 
 # Types of fields.
 CHAR = "C"
 NUMERAL = "N"
 DATE = "D"
 LOGICAL = "L"
+MEMO = "M"
+
+# Types of fields of Visual FoxPro
+INTEGER = "I"
+DOUBLE = "B"  # binary memo (block number) in dBASE
+CURRENCY = "Y"
+DATETIME = "T"
+FLOAT = "F"
+NULL_FLAGS = "0"
+
+# Types of fields which reader supports
+FIELD_TYPES = (
+    CHAR,
+    NUMERAL,
+    DATE,
+    LOGICAL,
+    MEMO,
+    INTEGER,
+    DOUBLE,
+    CURRENCY,
+    DATETIME,
+    FLOAT,
+    NULL_FLAGS,
+)
+
+# Struct-formats of binary (little-endian) values of fields by type and size,
+# values of other fields are unpacked as bytes
+BINARY_FORMATS = {
+    (INTEGER, 4): "i",
+    (DOUBLE, 8): "d",
+    (CURRENCY, 8): "q",
+    (MEMO, 4): "i",  # number of block in Visual FoxPro
+}
+
+# Types of fields which values are not text, so they are not stripped
+BINARY_TYPES = (INTEGER, DOUBLE, CURRENCY, DATETIME, NULL_FLAGS)
+
+# Number of decimal digits of currency, values are ints scaled by 10**4
+CURRENCY_DECIMALS = 4
+
+# Julian day of datetime.date.min (ordinal 1)
+JULIAN_DAY_OFFSET = 1721425
 
 # System encoding which is used to convert field names between bytes and string.
 SYSTEM_ENCODING = "ascii"
@@ -70,7 +114,10 @@ SIGNATURES = {
     0xFB: "FoxPro",
 }
 
-SUPPORTED_SIGNATURES = (0x03, 0x04, 0x05)
+SUPPORTED_SIGNATURES = (0x03, 0x04, 0x05, 0x30, 0x31, 0x83, 0x8B, 0xF5)
+
+# Signatures of Visual FoxPro tables
+VFP_SIGNATURES = (0x30, 0x31)
 
 # <   -- little endian
 # B   -- version number (signature)
@@ -88,6 +135,11 @@ SUPPORTED_SIGNATURES = (0x03, 0x04, 0x05)
 # 2x  -- pad (2B -- reserved)
 HEADER_FORMAT = "<B3BLHH17xB2x"
 
+# Offset of table flags in header, bit 0x01 is production index (MDX/CDX),
+# Visual FoxPro also sets 0x02 for memo and 0x04 for database container
+INDEX_FLAG_OFFSET = 28
+INDEX_FLAG = 0x01
+
 # <   -- little endian
 # 11s -- field name in ASCII (terminated by 0x00)
 # c   -- field type (ASCII)
@@ -106,6 +158,15 @@ HEADER_FORMAT = "<B3BLHH17xB2x"
 # 2x  -- pad (2B -- reserved)
 FIELD_DESCRIPTION_FORMAT = "<11sc4xBB14x"
 
+# Offset of field flags in field description (Visual FoxPro)
+FIELD_FLAGS_OFFSET = 18
+
+# Field flag of Visual FoxPro: field can store null values
+FIELD_NULLABLE = 0x02
+
+# Decimal exponents for quantizing, index is a number of decimal digits
+_DECIMAL_EXPONENTS = [Decimal(1).scaleb(-dec) for dec in range(256)]
+
 # Common functions
 
 
@@ -124,6 +185,30 @@ def dbf2date(dbf_str):
     return result
 
 
+def binary_format(typ, size):
+    """
+    Get struct-format of binary value of field, None if value
+    of field is unpacked as bytes
+    """
+    return BINARY_FORMATS.get((typ, size))
+
+
+def dbf2datetime(dbf_bytes):
+    """
+    Converts Visual FoxPro datetime to datetime.datetime
+
+    Args:
+        `dbf_bytes`:
+            8 bytes: julian day and milliseconds since midnight
+            (little-endian ints), None for empty datetime
+    """
+    day, msecs = struct.unpack("<ii", dbf_bytes)
+    if not day:
+        return None
+    result = datetime.datetime.fromordinal(day - JULIAN_DAY_OFFSET)
+    return result + datetime.timedelta(milliseconds=msecs)
+
+
 def date2dbf(dt):
     """
     Converts date from datetime.date to dbf-date (string in format YYYYMMDD)
@@ -175,5 +260,93 @@ def str2dbf(dt_str):
     return dbf_string.encode(SYSTEM_ENCODING)
 
 
+def dbf2scaled(dbf_str, dec):
+    """
+    Converts dbf-numeral to integer scaled by 10**`dec`, i.e. b" 12.34"
+    with `dec` 2 is converted to 1234. Extra decimal digits are
+    rounded half up, empty value is converted to 0.
+
+    Args:
+        `dbf_str`:
+            dbf-numeral (bytes)
+        `dec`:
+            number of decimal digits
+    """
+    value = dbf_str.strip()
+    if not value:
+        return 0
+    integer, _, fraction = value.partition(b".")
+    if (
+        integer.isdigit()
+        and len(fraction) <= dec
+        and (not fraction or fraction.isdigit())
+    ):
+        # the most common case: positive number without extra digits
+        return int(integer + fraction + b"0" * (dec - len(fraction)))
+    negative = value[:1] == b"-"
+    if negative or value[:1] == b"+":
+        value = value[1:]
+    integer, _, fraction = value.partition(b".")
+    digits = integer + fraction[:dec].ljust(dec, b"0")
+    if (
+        not (integer or fraction)
+        or (digits and not digits.isdigit())
+        or (fraction and not fraction.isdigit())
+    ):
+        raise ValueError("Wrong numeral value %r" % dbf_str)
+    result = int(digits or b"0")
+    if fraction[dec : dec + 1] >= b"5":
+        result += 1
+    return -result if negative else result
+
+
+def dbf2decimal(dbf_str, dec):
+    """
+    Converts dbf-numeral to Decimal with `dec` decimal digits exactly,
+    i.e. without intermediate float. Extra decimal digits are rounded
+    half up, empty value is converted to 0.
+
+    Args:
+        `dbf_str`:
+            dbf-numeral (bytes)
+        `dec`:
+            number of decimal digits
+    """
+    value = dbf_str.strip()
+    try:
+        point = value.find(b".")
+        if point >= 0 and len(value) - point == dec + 1:
+            # exactly `dec` digits after point, no need to quantize
+            return Decimal(value.decode(SYSTEM_ENCODING))
+        value = Decimal(value.decode(SYSTEM_ENCODING) or 0)
+        return value.quantize(_DECIMAL_EXPONENTS[dec], ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError("Wrong numeral value %r" % dbf_str)
+
+
+def flags2bitmap(flags, set_flags):
+    """
+    Packs flags (one flag per byte) to bitmap
+
+    Bit i % 8 of byte i // 8 in result is set if flags[i] is one
+    of `set_flags`.
+
+    Args:
+        `flags`:
+            bytes, one byte per flag
+        `set_flags`:
+            bytes, values of flags which are considered as set
+    """
+    table = bytearray(b"0" * 256)
+    for flag in set_flags:
+        table[flag] = ord("1")
+    bits = flags.translate(table)
+    result = bytearray((len(flags) + 7) // 8)
+    if bits:
+        value = int(bits[::-1], 2)
+        result[:] = value.to_bytes(len(result), "little")
+    return result
+
+
 # References:
 # [dbfspec]: http://www.clicketyclick.dk/databases/xbase/format/index.html
@@ -0,0 +1,227 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+Memo files of DBF (.dbt and .fpt)
+
+Value of memo field (type M) in DBF is a number of block of memo
+file where text is stored. Reader gives `Memo` handles instead of
+texts, memo file is opened and read only when text is requested:
+
+    with ydbf.open('notes.dbf') as dbf:
+        for rec in dbf:
+            if rec['ID'] in wanted:
+                print(rec['NOTE'].read())
+
+Recently read memos are kept in LRU cache of `MemoFile`, so repeated
+access to the same block doesn't read file again.
+
+Supported formats are dBASE III .dbt (text terminated by 0x1A),
+dBASE IV .dbt (blocks with length) and FoxPro .fpt.
+"""
+
+import builtins
+import functools
+import os
+from struct import unpack, unpack_from
+
+# Signatures of DBF with FoxPro memo files (.fpt), others use .dbt
+FPT_SIGNATURES = (0x30, 0x31, 0xF5)
+
+# Default number of memos kept in cache of memo file
+DEFAULT_CACHE_SIZE = 128
+
+# Block size of dBASE III memo file
+DBT_BLOCK_SIZE = 512
+
+# End of memo text in dBASE III memo file
+DBT_TERMINATOR = b"\x1a"
+
+# Start of memo block in dBASE IV memo file
+DBT4_BLOCK_SIGNATURE = b"\xff\xff\x08\x00"
+
+# Types of FoxPro memo blocks
+FPT_PICTURE = 0
+FPT_TEXT = 1
+FPT_OBJECT = 2
+
+
+def memo_path(dbf_path, sig):
+    """
+    Find memo file of DBF file `dbf_path` with signature `sig`,
+    None if there is no memo file
+    """
+    base, ext = os.path.splitext(dbf_path)
+    memo_ext = ".fpt" if sig in FPT_SIGNATURES else ".dbt"
+    for candidate in (memo_ext, memo_ext.upper()):
+        if os.path.exists(base + candidate):
+            return base + candidate
+    return None
+
+
+class MemoFile(object):
+    """
+    Memo file, opened on first read
+    """
+
+    def __init__(self, memo_file, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            `memo_file`:
+                file name or filehandler (opened for binary reading)
+            `cache_size`:
+                number of memos kept in LRU cache, 0 turns cache off
+        """
+        if isinstance(memo_file, str):
+            self.filename = memo_file
+            self.fh = None
+        else:
+            self.filename = getattr(memo_file, "name", None)
+            self.fh = memo_file
+        self.block_size = None
+        self._header = None
+        self.read = functools.lru_cache(cache_size)(self._readMemo)
+
+    def _open(self):
+        if self.fh is None:
+            self.fh = builtins.open(self.filename, "rb")
+        self.fh.seek(0)
+        self._header = self.fh.read(512)
+        self.block_size = self._blockSize(self._header)
+
+    def _blockSize(self, header):
+        raise NotImplementedError
+
+    def _readMemo(self, block):
+        """
+        Read memo from `block`, returns (type, bytes)
+        """
+        if self._header is None:
+            self._open()
+        self.fh.seek(block * self.block_size)
+        return self._readData()
+
+    def _readData(self):
+        raise NotImplementedError
+
+    def cache_info(self):
+        """
+        Get statistics of memo cache, named tuple
+        (hits, misses, maxsize, currsize)
+        """
+        return self.read.cache_info()
+
+    def close(self):
+        self.read.cache_clear()
+        if self.fh is not None:
+            self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class DbtFile(MemoFile):
+    """
+    dBASE III/IV memo file (.dbt)
+    """
+
+    def _blockSize(self, header):
+        # dBASE IV keeps size of block in header, dBASE III has it fixed
+        block_size = unpack_from("<H", header, 20)[0]
+        return block_size or DBT_BLOCK_SIZE
+
+    def _readData(self):
+        data = self.fh.read(self.block_size)
+        if data.startswith(DBT4_BLOCK_SIGNATURE):
+            # length includes 8 bytes of block header
+            length = unpack_from("<I", data, 4)[0] - 8
+            data = data[8:]
+            if length > len(data):
+                data += self.fh.read(length - len(data))
+            return FPT_TEXT, data[:length]
+        chunks = []
+        while data:
+            end = data.find(DBT_TERMINATOR)
+            if end >= 0:
+                chunks.append(data[:end])
+                break
+            chunks.append(data)
+            data = self.fh.read(self.block_size)
+        return FPT_TEXT, b"".join(chunks)
+
+
+class FptFile(MemoFile):
+    """
+    FoxPro memo file (.fpt)
+    """
+
+    def _blockSize(self, header):
+        return unpack_from(">H", header, 6)[0]
+
+    def _readData(self):
+        typ, length = unpack(">II", self.fh.read(8))
+        return typ, self.fh.read(length)
+
+
+def open_memo(memo_file, sig, cache_size=DEFAULT_CACHE_SIZE):
+    """
+    Get MemoFile of DBF with signature `sig`
+
+    Args:
+        `memo_file`:
+            file name or filehandler of memo file
+        `sig`:
+            signature of DBF file
+        `cache_size`:
+            number of memos kept in cache
+    """
+    if sig in FPT_SIGNATURES:
+        return FptFile(memo_file, cache_size)
+    return DbtFile(memo_file, cache_size)
+
+
+class Memo(object):
+    """
+    Lazy handle of memo, memo file is read on first access
+    """
+
+    __slots__ = ("memo_file", "block", "encoding")
+
+    def __init__(self, memo_file, block, encoding=None):
+        self.memo_file = memo_file  # MemoFile or None if not found
+        self.block = block
+        self.encoding = encoding
+
+    def _read(self):
+        if self.memo_file is None:
+            raise ValueError("Memo file of DBF is not found, memo cannot be read")
+        return self.memo_file.read(self.block)
+
+    def read_bytes(self):
+        """
+        Read raw bytes of memo
+        """
+        return self._read()[1]
+
+    def read(self):
+        """
+        Read memo, text memos are decoded to string (if reader
+        has encoding), pictures and objects are given as bytes
+        """
+        typ, data = self._read()
+        if typ == FPT_TEXT and self.encoding:
+            return data.decode(self.encoding)
+        return data
+
+    def __str__(self):
+        value = self.read()
+        return value if isinstance(value, str) else repr(value)
+
+    def __repr__(self):
+        return "Memo(block=%d)" % self.block
@@ -0,0 +1,530 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+Native dBASE/FoxPro indexes (read-only)
+
+Supported are dBASE III .NDX (single index), dBASE IV .MDX and FoxPro
+.CDX (multiple indexes, tags). Indexes are B-trees of keys and numbers
+of records, records are read by their numbers:
+
+    idx = native_index.open_index('clients.cdx')
+    tag = idx.tags['ACCOUNT']
+    with ydbf.open('clients.dbf') as dbf:
+        for rec in dbf.records_by_index(tag, '408', '409'):
+            ...
+
+Index objects (NDX index, MDX or CDX tag) provide `recnos(low, high)`
+(zero-based numbers of records in order of keys), `items()` (pairs
+of key and number of record) and `key(value)`, which converts python
+value to key. Only keys which are values of single field are
+meaningful for lookups, key expressions are not evaluated (see
+`expression` attribute). Chars are compared as encoded bytes padded
+by spaces, numerals as numbers, dates as julian days.
+
+[dbfspec]: http://www.clicketyclick.dk/databases/xbase/format/index.html
+"""
+
+import builtins
+import datetime
+import os
+from decimal import Decimal
+from struct import pack, unpack_from
+
+from ydbf import lib
+
+# NDX header format
+# I   -- number of root page
+# I   -- number of pages
+# 4x  -- reserved
+# H   -- length of key
+# H   -- max number of keys in page
+# H   -- type of key (0 -- char, 1 -- numeral or date)
+# I   -- size of key item
+# x   -- reserved
+# B   -- unique flag
+NDX_HEADER_FORMAT = "<II4xHHHIxB"
+NDX_PAGE_SIZE = 512
+
+# MDX header format (dBASE IV)
+# B   -- version
+# 3B  -- date of creation (YY, MM, DD)
+# 16s -- name of DBF file
+# H   -- number of 512-byte pages in block
+# H   -- size of block in bytes
+# B   -- production MDX flag
+# B   -- max number of tags
+# B   -- size of tag descriptor
+# x   -- reserved
+# H   -- number of tags
+MDX_HEADER_FORMAT = "<B3B16sHHBBBxH"
+MDX_TAGS_OFFSET = 544
+
+# MDX tag descriptor format
+# I   -- number of page of tag header
+# 11s -- name of tag
+# B   -- key format
+# 4x  -- threads of tags tree
+# c   -- type of key (C, D or N)
+MDX_TAG_FORMAT = "<I11sB4xc"
+
+# MDX tag header format
+# I   -- number of root page
+# I   -- number of pages
+# B   -- key format (0x08 -- descending)
+# c   -- type of key
+# 2x  -- reserved
+# H   -- length of key
+# H   -- max number of keys in block
+# H   -- secondary type of key
+# H   -- size of key item
+# 3x  -- reserved
+# B   -- unique flag
+MDX_TAG_HEADER_FORMAT = "<IIBc2xHHHH3xB"
+
+# CDX header format (FoxPro compact index)
+# i   -- offset of root node
+# i   -- offset of free nodes list
+# 4x  -- reserved
+# H   -- length of key
+# B   -- index options (0x01 -- unique, 0x20 -- compact,
+#                       0x40 -- compound)
+# B   -- signature
+CDX_HEADER_FORMAT = "<ii4xHBB"
+CDX_NODE_SIZE = 512
+
+# CDX node header format
+# H   -- attributes (0x01 -- root, 0x02 -- leaf)
+# H   -- number of keys
+# i   -- offset of left sibling (-1 if none)
+# i   -- offset of right sibling (-1 if none)
+CDX_NODE_FORMAT = "<HHii"
+
+# CDX leaf node header format
+# H   -- free space
+# I   -- mask of record number
+# B   -- mask of number of duplicate bytes
+# B   -- mask of number of trailing bytes
+# B   -- bits of record number
+# B   -- bits of number of duplicate bytes
+# B   -- bits of number of trailing bytes
+# B   -- size of key info (record number and counts)
+CDX_LEAF_FORMAT = "<HIBBBBBB"
+
+
+def _julian(value):
+    # dates of index keys are julian days
+    return value.toordinal() + lib.JULIAN_DAY_OFFSET
+
+
+def _encode(value, encoding):
+    if isinstance(value, str):
+        value = value.encode(encoding or lib.SYSTEM_ENCODING)
+    return value
+
+
+def _expression(raw):
+    return raw.split(b"\x00", 1)[0].strip().decode(lib.SYSTEM_ENCODING)
+
+
+class BTree(object):
+    """
+    Base class of native index (B-tree)
+
+    Subclasses read nodes: `_node(pointer)` returns pair (is_leaf,
+    entries), where entries are (key, pointer) of branch node (key is the
+    greatest key of child node, None means unbounded) or (key, number of
+    record) of leaf node. Keys are comparable python objects.
+    """
+
+    expression = ""  # key expression
+    descending = False
+    unique = False
+    root = 0
+
+    def _node(self, pointer):
+        raise NotImplementedError
+
+    def key(self, value, encoding=None):
+        """
+        Convert python `value` to key of index
+        """
+        raise NotImplementedError
+
+    def _walk(self, pointer, low):
+        is_leaf, entries = self._node(pointer)
+        for key, pointer in entries:
+            if self.descending or low is None or key is None or key >= low:
+                if is_leaf:
+                    yield key, pointer
+                else:
+                    yield from self._walk(pointer, low)
+
+    def items(self, low=None):
+        """
+        Iterate over (key, number of record) pairs in order of index,
+        starting from `low` key (ascending indexes only)
+        """
+        for key, recno in self._walk(self.root, low):
+            yield key, recno - 1
+
+    def recnos(self, low=None, high=None):
+        """
+        Iterate over numbers of records (zero-based) with keys between
+        `low` and `high` (both inclusive, None means unbounded)
+        in order of index
+        """
+        for key, recno in self.items(low):
+            if low is not None and key < low:
+                continue
+            if high is not None and key > high:
+                if self.descending:
+                    continue
+                break
+            yield recno
+
+
+class _IndexFile(object):
+    """
+    Base class of index file
+    """
+
+    def __init__(self, fh):
+        self.fh = fh
+
+    def _read(self, offset, size):
+        self.fh.seek(offset)
+        return self.fh.read(size)
+
+    def close(self):
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class NdxIndex(_IndexFile, BTree):
+    """
+    dBASE III index (.NDX)
+    """
+
+    def __init__(self, fh):
+        super(NdxIndex, self).__init__(fh)
+        header = self._read(0, NDX_PAGE_SIZE)
+        (
+            self.root,
+            self.pages,
+            self.key_length,
+            self.max_keys,
+            self.key_type,
+            self.item_size,
+            unique,
+        ) = unpack_from(NDX_HEADER_FORMAT, header)
+        self.unique = bool(unique)
+        self.expression = _expression(header[24:])
+        self.numeric = self.key_type != 0
+
+    def _decode(self, raw):
+        if self.numeric:
+            return unpack_from("<d", raw)[0]
+        return raw
+
+    def _node(self, pointer):
+        page = self._read(pointer * NDX_PAGE_SIZE, NDX_PAGE_SIZE)
+        (count,) = unpack_from("<I", page)
+        entries = []
+        is_leaf = True
+        for i in range(count):
+            offset = 4 + i * self.item_size
+            child, recno = unpack_from("<II", page, offset)
+            key = self._decode(page[offset + 8 : offset + 8 + self.key_length])
+            if child:
+                is_leaf = False
+                entries.append((key, child))
+            else:
+                entries.append((key, recno))
+        if not is_leaf or count == 0:
+            # branch node has one more child than keys
+            offset = 4 + count * self.item_size
+            if offset + 4 <= NDX_PAGE_SIZE:
+                (child,) = unpack_from("<I", page, offset)
+                if child:
+                    is_leaf = False
+                    entries.append((None, child))
+        return is_leaf, entries
+
+    def key(self, value, encoding=None):
+        if self.numeric:
+            if isinstance(value, datetime.date):
+                value = _julian(value)
+            return float(value)
+        return _encode(value, encoding).ljust(self.key_length)
+
+
+class MdxTag(BTree):
+    """
+    Tag of dBASE IV multiple index (.MDX)
+    """
+
+    def __init__(self, mdx, name, header_page, key_type):
+        self.mdx = mdx
+        self.name = name
+        header = mdx._read(header_page * NDX_PAGE_SIZE, NDX_PAGE_SIZE)
+        (
+            self.root,
+            pages,
+            key_format,
+            typ,
+            self.key_length,
+            self.max_keys,
+            secondary_type,
+            self.item_size,
+            unique,
+        ) = unpack_from(MDX_TAG_HEADER_FORMAT, header)
+        self.key_type = typ.decode(lib.SYSTEM_ENCODING) or key_type
+        self.descending = bool(key_format & 0x08)
+        self.unique = bool(unique)
+        self.expression = _expression(header[24:124])
+
+    def _decode(self, raw):
+        if self.key_type == lib.DATE:
+            return unpack_from("<d", raw)[0]
+        if self.key_type == lib.NUMERAL:
+            return _bcd2decimal(raw)
+        return raw
+
+    def _node(self, pointer):
+        block = self.mdx._read(pointer * NDX_PAGE_SIZE, self.mdx.block_size)
+        (count,) = unpack_from("<I", block)
+        entries = []
+        for i in range(count + 1):
+            offset = 8 + i * self.item_size
+            if offset + 4 > len(block):
+                break
+            (pointer,) = unpack_from("<I", block, offset)
+            if i == count:
+                # branch node has one more child than keys
+                if pointer:
+                    entries.append((None, pointer))
+                    return False, entries
+                break
+            key = self._decode(block[offset + 4 : offset + 4 + self.key_length])
+            entries.append((key, pointer))
+        return True, entries
+
+    def key(self, value, encoding=None):
+        if self.key_type == lib.DATE:
+            return float(_julian(value))
+        if self.key_type == lib.NUMERAL:
+            return Decimal(str(value))
+        return _encode(value, encoding).ljust(self.key_length)
+
+
+def _bcd2decimal(raw):
+    """
+    Convert 12-byte BCD numeral key of MDX to Decimal
+
+    Byte 0 is 0x34 + number of digits before point, bit 7 of byte 1
+    is a sign, bits 2-6 -- number of significant digits, bytes 2-11
+    are digits (two per byte).
+    """
+    exponent = raw[0] - 0x34
+    negative = raw[1] & 0x80
+    significant = (raw[1] >> 2) & 0x1F
+    digits = raw[2:12].hex()[:significant]
+    if not digits or not int(digits):
+        return Decimal(0)
+    value = Decimal(int(digits)).scaleb(exponent - len(digits))
+    return -value if negative else value
+
+
+class MdxIndex(_IndexFile):
+    """
+    dBASE IV multiple index (.MDX), tags are in `tags` dict
+    """
+
+    def __init__(self, fh):
+        super(MdxIndex, self).__init__(fh)
+        header = self._read(0, MDX_TAGS_OFFSET)
+        (
+            self.version,
+            year,
+            month,
+            day,
+            dbf_name,
+            pages_in_block,
+            block_size,
+            production,
+            max_tags,
+            tag_size,
+            number_of_tags,
+        ) = unpack_from(MDX_HEADER_FORMAT, header)
+        self.dbf_name = dbf_name.split(b"\x00", 1)[0].decode(lib.SYSTEM_ENCODING)
+        self.block_size = block_size or pages_in_block * NDX_PAGE_SIZE
+        self.production = bool(production)
+        self.tags = {}
+        table = self._read(MDX_TAGS_OFFSET, tag_size * number_of_tags)
+        for i in range(number_of_tags):
+            header_page, name, key_format, typ = unpack_from(
+                MDX_TAG_FORMAT, table, i * tag_size
+            )
+            name = name.split(b"\x00", 1)[0].strip().decode(lib.SYSTEM_ENCODING)
+            self.tags[name] = MdxTag(self, name, header_page, typ.decode("latin-1"))
+
+
+def _cdx_double(value):
+    """
+    Convert number to 8-byte key of CDX, keys compare as bytes
+    """
+    raw = int.from_bytes(pack(">d", value), "big")
+    if raw >> 63:
+        raw ^= (1 << 64) - 1
+    else:
+        raw |= 1 << 63
+    return raw.to_bytes(8, "big")
+
+
+class CdxTag(BTree):
+    """
+    Tag of FoxPro compound index (.CDX)
+
+    Keys are raw bytes: chars are padded by spaces, numerals and
+    dates (julian days) are transformed doubles (see `key`). CDX doesn't
+    store type of key, it is a type of field of key expression if it is
+    known (see `open_index`), char otherwise.
+    """
+
+    def __init__(self, cdx, name, offset, key_type=lib.CHAR):
+        self.cdx = cdx
+        self.name = name
+        self.key_type = key_type
+        header = cdx._read(offset, 2 * CDX_NODE_SIZE)
+        self.root, free, self.key_length, options, signature = unpack_from(
+            CDX_HEADER_FORMAT, header
+        )
+        self.unique = bool(options & 0x01)
+        self.compound = bool(options & 0x40)
+        (order,) = unpack_from("<H", header, 502)
+        self.descending = bool(order)
+        (key_length,) = unpack_from("<H", header, 510)
+        self.expression = _expression(header[512 : 512 + key_length])
+        # trailing bytes of keys are compressed, they are spaces for chars
+        self.pad = b" " if key_type == lib.CHAR else b"\x00"
+
+    def _node(self, pointer):
+        node = self.cdx._read(pointer, CDX_NODE_SIZE)
+        attributes, count, left, right = unpack_from(CDX_NODE_FORMAT, node)
+        key_length = self.key_length
+        entries = []
+        if not attributes & 0x02:
+            # interior node: key, record number and child (big-endian)
+            item = key_length + 8
+            for i in range(count):
+                offset = 12 + i * item
+                key = node[offset : offset + key_length]
+                recno, child = unpack_from(">II", node, offset + key_length)
+                entries.append((key, child))
+            return False, entries
+        (
+            free,
+            recno_mask,
+            dup_mask,
+            trail_mask,
+            recno_bits,
+            dup_bits,
+            trail_bits,
+            info_size,
+        ) = unpack_from(CDX_LEAF_FORMAT, node, 12)
+        end = CDX_NODE_SIZE
+        key = b""
+        for i in range(count):
+            offset = 24 + i * info_size
+            info = int.from_bytes(node[offset : offset + info_size], "little")
+            recno = info & recno_mask
+            dup = (info >> recno_bits) & dup_mask
+            trail = (info >> (recno_bits + dup_bits)) & trail_mask
+            size = key_length - dup - trail
+            end -= size
+            key = key[:dup] + node[end : end + size] + self.pad * trail
+            entries.append((key, recno))
+        return True, entries
+
+    def key(self, value, encoding=None):
+        if self.key_type == lib.DATE:
+            return _cdx_double(_julian(value))
+        if self.key_type != lib.CHAR:
+            return _cdx_double(float(value))
+        return _encode(value, encoding).ljust(self.key_length)
+
+
+class CdxIndex(_IndexFile):
+    """
+    FoxPro compound index (.CDX), tags are in `tags` dict
+    """
+
+    def __init__(self, fh, field_types=None):
+        super(CdxIndex, self).__init__(fh)
+        field_types = field_types or {}
+        directory = CdxTag(self, "", 0)
+        self.tags = {}
+        for name, offset in directory._walk(directory.root, None):
+            name = name.rstrip(b"\x00 ").decode(lib.SYSTEM_ENCODING)
+            key_type = lib.CHAR
+            expression = CdxTag(self, name, offset).expression.upper()
+            if expression in field_types:
+                key_type = field_types[expression]
+            self.tags[name] = CdxTag(self, name, offset, key_type)
+
+
+INDEX_TYPES = {
+    ".ndx": NdxIndex,
+    ".mdx": MdxIndex,
+    ".cdx": CdxIndex,
+}
+
+
+def open_index(path, reader=None):
+    """
+    Open native index file, type of index is defined by extension
+    (.ndx, .mdx or .cdx)
+
+    Args:
+        `path`:
+            name of index file
+        `reader`:
+            YDbfReader of indexed DBF (optional), types of its fields
+            are used as types of CDX keys
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in INDEX_TYPES:
+        raise ValueError(
+            "Unknown type of index %s, supported are %s"
+            % (path, ", ".join(sorted(INDEX_TYPES)))
+        )
+    fh = builtins.open(path, "rb")
+    try:
+        if extension == ".cdx" and reader is not None:
+            field_types = dict((name.upper(), typ) for name, typ, _, _ in reader.fields)
+            return CdxIndex(fh, field_types)
+        return INDEX_TYPES[extension](fh)
+    except Exception:
+        fh.close()
+        raise
+
+
+def production_index(dbf_path):
+    """
+    Find production index (.mdx or .cdx with the same name as DBF)
+    of DBF file `dbf_path`, returns its path or None
+    """
+    stem = os.path.splitext(dbf_path)[0]
+    for extension in (".mdx", ".cdx", ".MDX", ".CDX"):
+        if os.path.exists(stem + extension):
+            return stem + extension
+    return None
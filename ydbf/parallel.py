@@ -0,0 +1,159 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+Parallel scan of DBF file
+
+Records of DBF are split into contiguous ranges, each range is read
+in separate process by its own reader:
+
+    def total(records):
+        return sum(rec['AMOUNT'] for rec in records)
+
+    amount = parallel.scan('big.dbf', total, workers=8,
+                           reduce=operator.add, fields=['AMOUNT'])
+
+Aggregates of numeric fields (see `ydbf.aggregate`) are computed over
+raw values in each process and merged:
+
+    totals = parallel.aggregate('big.dbf', {'AMOUNT': 'sum', '*': 'count'})
+
+`func` (and `reduce`) should be picklable, i.e. defined at top level
+of some module.
+"""
+
+import builtins
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ydbf import aggregate as ydbf_aggregate
+from ydbf.reader import YDbfReader
+
+
+def partition(numrec, chunks):
+    """
+    Split records [0, numrec) into `chunks` contiguous ranges,
+    returns list of (start_from, limit) pairs
+    """
+    chunks = max(1, min(chunks, numrec))
+    size, rest = divmod(numrec, chunks)
+    ranges = []
+    start = 0
+    for i in range(chunks):
+        limit = size + (1 if i < rest else 0)
+        ranges.append((start, limit))
+        start += limit
+    return ranges
+
+
+def _scan_range(path, func, start_from, limit, reader_options, records_options):
+    """
+    Apply `func` to records of range (runs in worker process)
+    """
+    with YDbfReader(builtins.open(path, "rb"), **reader_options) as reader:
+        return func(
+            reader.records(start_from=start_from, limit=limit, **records_options)
+        )
+
+
+def scan(
+    path, func, workers=None, chunks=None, reduce=None, reader_options=None, **options
+):
+    """
+    Apply `func` to records of DBF file in parallel
+
+    Returns list of results of `func` for each range of records (in
+    order of ranges) or, if `reduce` is set, results reduced by it.
+
+    Args:
+        `path`:
+            name of DBF file
+        `func`:
+            function which gets iterator over records of range
+        `workers`:
+            number of worker processes, number of CPUs by default.
+            If 1, records are read in current process.
+        `chunks`:
+            number of ranges, equal to `workers` by default
+        `reduce`:
+            function of two arguments to reduce results (optional)
+        `reader_options`:
+            dict of options for YDbfReader (optional)
+        `options`:
+            options for `YDbfReader.records`, e.g. `fields` or `where`
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunks is None:
+        chunks = workers
+    reader_options = reader_options or {}
+    with YDbfReader(builtins.open(path, "rb"), **reader_options) as reader:
+        numrec = reader.numrec
+    ranges = partition(numrec, chunks)
+    args = [
+        (path, func, start_from, limit, reader_options, options)
+        for start_from, limit in ranges
+    ]
+    if workers == 1:
+        results = [_scan_range(*arg) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_scan_range, *zip(*args)))
+    if reduce is not None:
+        return functools.reduce(reduce, results)
+    return results
+
+
+def _aggregate_range(path, spec, start_from, limit, reader_options, where):
+    """
+    Compute partial aggregates of range (runs in worker process)
+    """
+    with YDbfReader(builtins.open(path, "rb"), **reader_options) as reader:
+        return ydbf_aggregate.scan(reader, spec, where, start_from, start_from + limit)
+
+
+def aggregate(path, spec, workers=None, chunks=None, reader_options=None, where=None):
+    """
+    Compute aggregates of numeric fields of DBF file in parallel
+
+    Returns the same result as `YDbfReader.aggregate`.
+
+    Args:
+        `path`:
+            name of DBF file
+        `spec`:
+            dict {NAME: aggregate} (see `ydbf.aggregate`)
+        `workers`:
+            number of worker processes, number of CPUs by default.
+            If 1, records are read in current process.
+        `chunks`:
+            number of ranges, equal to `workers` by default
+        `reader_options`:
+            dict of options for YDbfReader (optional)
+        `where`:
+            condition (or sequence of conditions) from `ydbf.query`,
+            should be picklable (optional)
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunks is None:
+        chunks = workers
+    reader_options = reader_options or {}
+    with YDbfReader(builtins.open(path, "rb"), **reader_options) as reader:
+        ranges = partition(reader.numrec, chunks)
+        args = [
+            (path, spec, start_from, limit, reader_options, where)
+            for start_from, limit in ranges
+        ]
+        if workers == 1:
+            states = [_aggregate_range(*arg) for arg in args]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                states = list(executor.map(_aggregate_range, *zip(*args)))
+        return ydbf_aggregate.results(
+            reader, spec, functools.reduce(ydbf_aggregate.merge, states)
+        )
@@ -0,0 +1,494 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+Queries over DBF records
+
+Conditions are passed to `YDbfReader.records` as `where` option:
+
+    from ydbf import query
+
+    dbf.records(where=query.eq('REGION', 'MSK'))
+    dbf.records(where=[
+        query.isin('REGION', ('MSK', 'SPB')),
+        query.between('UPDATE', datetime.date(2009, 1, 1), None),
+    ])
+
+Each condition is compiled against raw bytes of field, so records
+which don't match are skipped before any conversion happens.
+Chars are compared as encoded bytes, numerals -- as integers scaled
+by number of decimal digits, dates -- as YYYYMMDD bytes. Empty dates
+don't match any condition.
+
+Records are grouped by values of fields with `group_by`, which yields
+aggregates (see `ydbf.aggregate`) of each group:
+
+    for (region, date), totals in query.group_by(
+        dbf, ['REGION', 'DATE'], {'AMOUNT': 'sum', '*': 'count'}
+    ):
+        ...
+"""
+
+import collections
+import itertools
+import operator
+import pickle
+import tempfile
+from decimal import Decimal
+
+import ydbf
+from ydbf import lib
+
+# Number of files partial aggregates are spilled to by hash of group
+SPILL_PARTITIONS = 16
+
+_TRUE_LOGICALS = (b"Y", b"y", b"T", b"t")
+
+
+def _field_spec(reader, name):
+    """
+    Get (NAME, TYPE, SIZE, DECIMAL) of field `name`
+    """
+    for field in reader.fields:
+        if field[0] == name:
+            return field
+    raise ValueError("Unknown field %s" % name)
+
+
+def _raw_key(field):
+    """
+    Make function which converts raw value of `field` to comparable key
+    """
+    name, typ, size, dec = field
+    if typ == lib.CHAR:
+        return lambda raw: raw.rstrip(b"\x00").rstrip()
+    if typ in (lib.NUMERAL, lib.FLOAT):
+        return lambda raw: lib.dbf2scaled(raw.rstrip(b"\x00"), dec)
+    if lib.binary_format(typ, size) and typ != lib.MEMO:
+        # binary numbers are unpacked by struct already
+        return lambda raw: raw
+    if typ == lib.DATE:
+        return lambda raw: raw if len(raw) == 8 and raw.isdigit() else None
+    if typ == lib.LOGICAL:
+        return lambda raw: raw.strip() in _TRUE_LOGICALS
+    raise ValueError("Cannot compare values of field %s (type %s)" % (name, typ))
+
+
+def _encode(reader, value):
+    """
+    Encode char value the same way as it is stored in DBF
+    """
+    if isinstance(value, str):
+        value = value.encode(reader.encoding or lib.SYSTEM_ENCODING)
+    return value
+
+
+def _value_key(reader, field, value):
+    """
+    Convert python `value` to key comparable with raw keys of `field`
+    """
+    name, typ, size, dec = field
+    if typ == lib.CHAR:
+        return _encode(reader, value).rstrip()
+    if typ == lib.DOUBLE and lib.binary_format(typ, size):
+        return float(value)
+    if typ in (lib.NUMERAL, lib.FLOAT, lib.INTEGER, lib.CURRENCY):
+        if typ == lib.CURRENCY:
+            dec = lib.CURRENCY_DECIMALS
+        key = Decimal(str(value)).scaleb(dec)
+        if key == key.to_integral_value():
+            key = int(key)
+        return key
+    if typ == lib.DATE:
+        return lib.date2dbf(value)
+    if typ == lib.LOGICAL:
+        return bool(value)
+    raise ValueError("Cannot compare values of field %s (type %s)" % (name, typ))
+
+
+class Condition(object):
+    """
+    Base class for conditions over value of single field
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def compile(self, reader):
+        """
+        Make function which checks raw value of field
+        """
+        return self._compile(reader, _field_spec(reader, self.field))
+
+    def _compile(self, reader, field):
+        raise NotImplementedError
+
+
+class Equal(Condition):
+    def __init__(self, field, value):
+        super(Equal, self).__init__(field)
+        self.value = value
+
+    def _compile(self, reader, field):
+        raw_key = _raw_key(field)
+        expected = _value_key(reader, field, self.value)
+        return lambda raw: raw_key(raw) == expected
+
+
+class Prefix(Condition):
+    def __init__(self, field, prefix):
+        super(Prefix, self).__init__(field)
+        self.prefix = prefix
+
+    def _compile(self, reader, field):
+        if field[1] != lib.CHAR:
+            raise ValueError(
+                "Prefix condition works for char fields only, "
+                "but field %s has type %s" % (field[0], field[1])
+            )
+        prefix = _encode(reader, self.prefix)
+        return lambda raw: raw.startswith(prefix)
+
+
+class Between(Condition):
+    def __init__(self, field, low=None, high=None):
+        super(Between, self).__init__(field)
+        self.low = low
+        self.high = high
+
+    def _compile(self, reader, field):
+        raw_key = _raw_key(field)
+        low = None if self.low is None else _value_key(reader, field, self.low)
+        high = None if self.high is None else _value_key(reader, field, self.high)
+
+        def check(raw):
+            key = raw_key(raw)
+            if key is None:
+                return False
+            if low is not None and key < low:
+                return False
+            if high is not None and key > high:
+                return False
+            return True
+
+        return check
+
+
+class In(Condition):
+    def __init__(self, field, values):
+        super(In, self).__init__(field)
+        self.values = tuple(values)
+
+    def _compile(self, reader, field):
+        raw_key = _raw_key(field)
+        expected = frozenset(_value_key(reader, field, value) for value in self.values)
+        return lambda raw: raw_key(raw) in expected
+
+
+def eq(field, value):
+    """
+    Value of `field` is equal to `value`
+    """
+    return Equal(field, value)
+
+
+def prefix(field, prefix):
+    """
+    Value of char `field` starts with `prefix`
+    """
+    return Prefix(field, prefix)
+
+
+def between(field, low=None, high=None):
+    """
+    Value of `field` is between `low` and `high` (both inclusive),
+    None means unbounded
+    """
+    return Between(field, low, high)
+
+
+def isin(field, values):
+    """
+    Value of `field` is one of `values`
+    """
+    return In(field, values)
+
+
+def _conditions(where):
+    if isinstance(where, Condition):
+        return (where,)
+    return tuple(where)
+
+
+def where_fields(where):
+    """
+    Names of fields used by `where` conditions
+    """
+    return [condition.field for condition in _conditions(where)]
+
+
+def compile_where(where, reader, names):
+    """
+    Make function which checks raw record
+
+    Args:
+        `where`:
+            condition or sequence of conditions
+        `reader`:
+            YDbfReader instance
+        `names`:
+            names of values in raw record
+    """
+    checks = []
+    for condition in _conditions(where):
+        if condition.field not in names:
+            raise ValueError("Unknown field %s" % condition.field)
+        pos = names.index(condition.field)
+        check = _record_check(pos, condition.compile(reader))
+        if condition.field in reader.null_bits and reader._null_flags in names:
+            # condition on null value is false
+            flags = names.index(reader._null_flags)
+            check = _not_null(check, flags, reader.null_bits[condition.field])
+        checks.append(check)
+    if len(checks) == 1:
+        return checks[0]
+    return lambda record: all(check(record) for check in checks)
+
+
+def _record_check(pos, check):
+    return lambda record: check(record[pos])
+
+
+def _not_null(check, flags, bit):
+    def check_not_null(record):
+        if int.from_bytes(record[flags], "little") >> bit & 1:
+            return False
+        return check(record)
+
+    return check_not_null
+
+
+def group_by(reader, keys, aggs, where=None, max_groups=None, spill_dir=None):
+    """
+    Group live records by values of `keys` fields and compute
+    aggregates `aggs` of each group
+
+    Groups are hashed by raw values of keys normalized the same way
+    as in conditions (padding of chars, spelling of numerals and
+    logicals), so key is converted once per group. Aggregated values
+    are parsed the same way as in `YDbfReader.aggregate`.
+
+    Yields (key, aggregates) pairs, where key is a tuple of values
+    of `keys` and aggregates is a dict like result of
+    `YDbfReader.aggregate`. Groups are yielded in order of their
+    first records unless partial aggregates are spilled to disk.
+
+    Args:
+        `reader`:
+            YDbfReader instance
+        `keys`:
+            names of fields to group by
+        `aggs`:
+            dict {NAME: aggregate} (see `ydbf.aggregate`)
+        `where`:
+            condition (or sequence of conditions) from `ydbf.query`
+            (optional)
+        `max_groups`:
+            max number of groups kept in memory (optional), when it is
+            exceeded partial aggregates are spilled to temporary files
+            split by hash of key, then files are merged one by one.
+            No limit by default.
+        `spill_dir`:
+            directory of temporary files, default temporary directory
+            is used if not set
+    """
+    aggregate = ydbf.aggregate
+    if isinstance(keys, str):
+        keys = [keys]
+    keys = list(keys)
+    spec = aggregate.normalize(aggs)
+    fields = [name for name, aggregates in spec if name != aggregate.ALL]
+    names, chunks = aggregate.raw_chunks(reader, set(keys) | set(fields), where)
+    parsers = aggregate.column_parsers(reader, fields, names)
+    raw_group_key = _raw_group_key(reader, keys, names)
+    group_key = _group_key(reader, keys)
+    decode = _key_decoder(reader, keys)
+    # count of records is the last state of group
+    # groups are ordered by first records (dict isn't ordered on Python 3.5)
+    groups = collections.OrderedDict()  # key -> (first raw key, list of states)
+    spills = []
+    try:
+        for chunk in chunks:
+            _update_groups(groups, raw_group_key, group_key, chunk, parsers)
+            if max_groups is not None and len(groups) > max_groups:
+                if not spills:
+                    spills = [
+                        tempfile.TemporaryFile(dir=spill_dir)
+                        for i in range(SPILL_PARTITIONS)
+                    ]
+                _spill(groups, spills)
+                groups = collections.OrderedDict()
+        if spills:
+            _spill(groups, spills)
+            partitions = (_load_spill(fh) for fh in spills)
+        else:
+            partitions = [groups]
+        for partition in partitions:
+            for raw_key, states in partition.values():
+                named = dict(zip(fields, states))
+                named[aggregate.ALL] = states[-1]
+                yield decode(raw_key), aggregate.results(reader, aggs, named)
+    finally:
+        for fh in spills:
+            fh.close()
+
+
+def _update_groups(groups, raw_group_key, group_key, chunk, parsers):
+    """
+    Add raw records of `chunk` to partial aggregates of `groups`
+    """
+    columns = ydbf.aggregate.parse_columns(parsers, chunk)
+    # rows of chunk are bucketed by raw key, so key is normalized
+    # and states are updated once per raw key of chunk
+    buckets = collections.OrderedDict()
+    rows = zip(*columns) if columns else itertools.repeat(())
+    for raw_key, row in zip(map(raw_group_key, chunk), rows):
+        bucket = buckets.get(raw_key)
+        if bucket is None:
+            bucket = buckets[raw_key] = []
+        bucket.append(row)
+    for raw_key, rows in buckets.items():
+        key = group_key(raw_key)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = (
+                raw_key,
+                [ydbf.aggregate.State() for i in range(len(parsers) + 1)],
+            )
+        states = group[1]
+        for pos, state in enumerate(states[:-1]):
+            # null values are None
+            state.update([row[pos] for row in rows if row[pos] is not None])
+        states[-1].count += len(rows)
+
+
+def _raw_group_key(reader, keys, names):
+    """
+    Make function which gets raw key of group (tuple of raw values,
+    None for null values) from raw record with values of `names`
+    """
+    if not keys:
+        return lambda record: ()
+    get = operator.itemgetter(*[names.index(name) for name in keys])
+    if len(keys) == 1:
+        get = _single_key(get)
+    nulls = [
+        (pos, reader.null_bits[name])
+        for pos, name in enumerate(keys)
+        if name in reader.null_bits
+    ]
+    if not nulls or reader._null_flags not in names:
+        return get
+    get_flags = operator.itemgetter(names.index(reader._null_flags))
+
+    def raw_group_key(record):
+        flags = int.from_bytes(get_flags(record), "little")
+        if not flags:
+            return get(record)
+        raw_key = list(get(record))
+        for pos, bit in nulls:
+            if flags >> bit & 1:
+                raw_key[pos] = None
+        return tuple(raw_key)
+
+    return raw_group_key
+
+
+def _single_key(get):
+    return lambda record: (get(record),)
+
+
+def _group_key(reader, keys):
+    """
+    Make function which normalizes raw key of group, so different
+    spellings of the same values give the same key
+    """
+    normalizers = []
+    for name in keys:
+        field = _field_spec(reader, name)
+        if field[1] in (lib.CHAR, lib.NUMERAL, lib.FLOAT, lib.DATE, lib.LOGICAL):
+            normalizers.append(_raw_key(field))
+        else:
+            # binary values are unpacked already, others are kept as is
+            normalizers.append(None)
+    if not any(normalizers):
+        return lambda raw_key: raw_key
+
+    def group_key(raw_key):
+        return tuple(
+            raw if normalize is None or raw is None else normalize(raw)
+            for normalize, raw in zip(normalizers, raw_key)
+        )
+
+    return group_key
+
+
+def _key_decoder(reader, keys):
+    """
+    Make function which converts raw key of group to values
+    """
+    converters = []
+    for name in keys:
+        field = _field_spec(reader, name)
+        conv = reader.converters[name]
+        binary = name in reader._binary_fields
+        converters.append((conv, field[2], field[3], binary))
+
+    def decode(raw_key):
+        return tuple(
+            (
+                None
+                if raw is None
+                else conv(raw if binary else raw.rstrip(b"\x00"), size, dec)
+            )
+            for (conv, size, dec, binary), raw in zip(converters, raw_key)
+        )
+
+    return decode
+
+
+def _spill(groups, spills):
+    """
+    Append partial aggregates of `groups` to files `spills`
+    split by hash of key
+    """
+    partitions = [[] for fh in spills]
+    for key, group in groups.items():
+        partitions[hash(key) % len(spills)].append((key, group))
+    for fh, partition in zip(spills, partitions):
+        if partition:
+            pickle.dump(partition, fh, pickle.HIGHEST_PROTOCOL)
+
+
+def _load_spill(fh):
+    """
+    Load partial aggregates of spill file and merge them by key
+    """
+    groups = {}
+    fh.seek(0)
+    while True:
+        try:
+            partition = pickle.load(fh)
+        except EOFError:
+            break
+        for key, (raw_key, states) in partition:
+            merged = groups.get(key)
+            if merged is None:
+                groups[key] = (raw_key, states)
+                continue
+            for state, other in zip(merged[1], states):
+                state.merge(other)
+    return groups
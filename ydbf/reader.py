@@ -8,11 +8,174 @@
 DBF reader
 """
 
+import array
 import datetime
+import functools
+import io
+import itertools
+import keyword
+import mmap
+import operator
+import sys
+from collections import namedtuple
+from collections.abc import Mapping
 from decimal import Decimal
-from struct import calcsize, unpack
+from struct import Struct, calcsize, iter_unpack, unpack, unpack_from
 
+from ydbf import aggregate as ydbf_aggregate
+from ydbf import arrays
+from ydbf import index
 from ydbf import lib
+from ydbf import memo
+from ydbf import query
+from ydbf import stats as ydbf_stats
+
+# Size of block (in bytes) which records() reads from file at once
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Errors which may occur while converting record
+# (UnicodeDecodeError is a subclass of ValueError)
+CONVERSION_ERRORS = (IndexError, ValueError, TypeError, KeyError)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _fill_nulls(column, offset, nulls):
+    # null values of column built by `read_columns` from `offset`
+    null = None
+    if isinstance(column, array.array):
+        null = float("nan") if column.typecode == "d" else 0
+    for i in nulls:
+        column[offset + i] = null
+
+
+def _raw_value(val, size, dec):
+    # value of binary field is already unpacked by struct
+    return val
+
+
+# Deletion flags of deleted records, i.e. all but b" "
+DELETED_FLAGS = bytes(flag for flag in range(256) if flag != ord(" "))
+
+# Modes of conversion of numerals with decimal digits
+NUMERIC_MODES = ("decimal", "int", "float")
+
+# Types of records which YDbfReader.records() yields
+ROW_TYPES = ("dict", "tuple", "namedtuple", "slots")
+
+
+def _make_slots_class(class_name, names):
+    """
+    Generate light-weight class of records with __slots__
+    """
+    names = tuple(names)
+    for name in names:
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise ValueError(
+                "Cannot make class with __slots__ for field %s, "
+                "name of field is not valid identifier" % name
+            )
+    namespace = {"new": object.__new__}
+    source = "def _make(cls, values):\n    self = new(cls)\n"
+    if names:
+        source += "    %s, = values\n" % ", ".join("self." + name for name in names)
+    source += "    return self\n"
+    exec(compile(source, "<ydbf record class>", "exec"), namespace)
+
+    def __init__(self, *values):
+        if len(values) != len(names):
+            raise TypeError(
+                "%s expects %d values, got %d" % (class_name, len(names), len(values))
+            )
+        for name, value in zip(names, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return "%s(%s)" % (
+            class_name,
+            ", ".join("%s=%r" % (name, getattr(self, name)) for name in names),
+        )
+
+    def __iter__(self):
+        return (getattr(self, name) for name in names)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def _asdict(self):
+        return dict(zip(names, self))
+
+    return type(
+        class_name,
+        (object,),
+        {
+            "__slots__": names,
+            "_fields": names,
+            "_make": classmethod(namespace["_make"]),
+            "__init__": __init__,
+            "__repr__": __repr__,
+            "__iter__": __iter__,
+            "__eq__": __eq__,
+            "__hash__": None,
+            "_asdict": _asdict,
+        },
+    )
+
+
+class LazyRecord(Mapping):
+    """
+    Record which converts value of field on first access
+
+    Converted values are cached, so each field is converted once.
+    """
+
+    __slots__ = ("_raw", "_recno", "_layout", "_reader", "_values")
+
+    def __init__(self, raw, recno, layout, reader):
+        self._raw = raw  # bytes of record
+        self._recno = recno
+        self._layout = layout
+        self._reader = reader
+        self._values = {}
+
+    def __getitem__(self, name):
+        values = self._values
+        if name in values:
+            return values[name]
+        conv, offset, size, dec, unpack, null = self._layout[name]
+        if null is not None:
+            flags_offset, flags_size, bit = null
+            flags = self._raw[flags_offset : flags_offset + flags_size]
+            if int.from_bytes(flags, "little") >> bit & 1:
+                values[name] = None
+                return None
+        try:
+            if unpack is None:
+                raw = self._raw[offset : offset + size].rstrip(b"\x00")
+            else:
+                raw = unpack(self._raw, offset)[0]
+            value = conv(raw, size, dec)
+        except CONVERSION_ERRORS as err:
+            raise self._reader._conversionError(err, self._recno)
+        values[name] = value
+        return value
+
+    def __contains__(self, name):
+        # checked by layout, so value is not converted
+        return name in self._layout
+
+    def __iter__(self):
+        return iter(self._layout)
+
+    def __len__(self):
+        return len(self._layout)
+
+    def __repr__(self):
+        return "LazyRecord(%r)" % dict(self)
 
 
 class YDbfReader(object):
@@ -22,7 +185,23 @@ class YDbfReader(object):
     Instance is an iterator over DBF records
     """
 
-    def __init__(self, fh, fields=None, use_unicode=True, encoding=None):
+    def __init__(
+        self,
+        fh,
+        fields=None,
+        use_unicode=True,
+        encoding=None,
+        use_mmap=False,
+        block_size=DEFAULT_BLOCK_SIZE,
+        numeric_mode="decimal",
+        cache_size=None,
+        categorical=None,
+        streaming=None,
+        stats=None,
+        stats_callback=None,
+        memo_file=None,
+        memo_cache_size=memo.DEFAULT_CACHE_SIZE,
+    ):
         """
         Iterator over DBF records
 
@@ -42,9 +221,95 @@ class YDbfReader(object):
             `encoding`:
                 force usage of explicitly defined encoding
                 instead of builtin one. By default None.
+
+            `use_mmap`:
+                map the file into memory and unpack records by blocks
+                straight from the mapping instead of reading blocks
+                from file. It makes random access and scans of deletion
+                flags cheaper, full scans of records take about the same
+                time as reading by blocks (decoding prevails). Requires
+                a real file (with a file descriptor). By default False.
+
+            `block_size`:
+                size (in bytes) of block which is read from file at once
+                and decoded record by record. Block holds at least one
+                record. By default 4 MiB.
+
+            `numeric_mode`:
+                how numerals with decimal digits are converted: to
+                Decimal ("decimal"), to int scaled by number of decimal
+                digits, i.e. amount of cents for money ("int"), or to
+                float ("float"). Either one mode for all fields or
+                dict {NAME: mode}, fields not in dict are converted
+                to Decimal. Decimals and ints are made straight from
+                digits, so they are exact. By default "decimal".
+
+            `cache_size`:
+                size of LRU cache of converted values of date and char
+                fields, so repeated values are converted once and
+                shared. Either one size for all date and char fields or
+                dict {NAME: size}. Statistics of caches are available
+                via `cache_info()`. By default None (no caches).
+
+            `categorical`:
+                names of char fields which are converted to integer
+                codes instead of strings. Value of code N is
+                `categories[NAME][N]`, codes are given in order of
+                first occurrence of values. By default None.
+
+            `streaming`:
+                read `fh` as forward-only stream (pipe, socket,
+                stdin, etc), i.e. without seeks: header is parsed
+                from the stream, records are read by blocks. Random
+                access, reverse iteration and repeated iteration are
+                not available (io.UnsupportedOperation is raised).
+                Stream should be at the start of DBF. By default
+                None, i.e. streaming mode is used if `fh` is not
+                seekable.
+
+            `stats`:
+                collect statistics of `records()` (see `ydbf.stats`):
+                True or `ydbf.stats.Stats` instance. Statistics are
+                available as `stats` attribute. Converters are timed
+                per type of field, so reading with statistics is
+                slower. By default None (no statistics).
+
+            `stats_callback`:
+                function which gets statistics each time iteration
+                over `records()` is over, turns statistics on.
+                By default None.
+
+            `memo_file`:
+                file name or filehandler of memo file (.dbt or .fpt)
+                of memo fields. Values of memo fields are `ydbf.memo.Memo`
+                handles, memo file is read only when text is requested.
+                By default memo file is looked up next to DBF file.
+
+            `memo_cache_size`:
+                number of memos kept in LRU cache of memo file.
+                By default 128.
         """
+        if streaming is None:
+            seekable = getattr(fh, "seekable", None)
+            streaming = seekable is not None and not seekable()
+        if streaming and use_mmap:
+            raise ValueError("Cannot use mmap mode in streaming mode")
         self.fh = fh  # filehandler
+        self.streaming = streaming
+        self._position = 0  # position in stream (streaming mode only)
+        self.use_mmap = use_mmap
+        self.block_size = block_size
+        self.mm = None  # memory map of file (mmap mode only)
         self.explicit_encoding = encoding
+        self.numeric_mode = numeric_mode
+        self.cache_size = cache_size
+        self.categorical = tuple(categorical or ())
+        self.categories = {}  # values of codes of categorical fields
+        self.stats = ydbf_stats.make_stats(stats, stats_callback)
+        self.stats_callback = stats_callback
+        self.memo_file = memo_file
+        self.memo_cache_size = memo_cache_size
+        self.memo = None  # MemoFile of memo fields
         if fields:
             self._fields = [("_deletion_flag", lib.CHAR, 1, 0)] + list(fields)
             self.fields = list(fields)
@@ -65,6 +330,12 @@ class YDbfReader(object):
         self.stop_at = 0  # number of rec, iteration stopped at
         # (not include this)
         self.recfmt = ""  # struct-format of rec
+        self._formats = {}  # struct-formats of fields
+        self._byte_order = ""  # "<" if record has binary values
+        self._binary_fields = frozenset()  # fields which values are not stripped
+        self._raw_fields = frozenset()  # binary fields which need no conversion
+        self.null_bits = {}  # nullable field -> bit of _NullFlags (Visual FoxPro)
+        self._null_flags = None  # name of field with null flags
         self.recsize = 0  # size of each record (in bytes)
         self.dt = None  # date of file creation
         self.dbf2date = lib.dbf2date  # function for conversion from dbf to date
@@ -73,11 +344,19 @@ class YDbfReader(object):
         self.builtin_encoding = None
 
         self.converters = {}
+        self.field_converters = ()  # (converter, name, size, dec) for each field
+        self._decoders = {}  # compiled decoders of raw records
+        self._row_classes = {}  # generated classes of records
+        self._caches = {}  # cached converters of fields
+        self._indexes = {}  # opened indexes of fields
         self.action_resolvers = ()
 
         self.iterator = None
 
         self._readHeader()
+        self._openMemo()
+        if use_mmap:
+            self._mapFile()
         if use_unicode:
             self._defineEncoding()
         self._makeActions()
@@ -104,7 +383,51 @@ class YDbfReader(object):
             return (val.strip() or 0) and int(val.strip())
 
         def dbf2py_decimal(val, size, dec):
-            return Decimal(("%%.%df" % dec) % float(val.strip() or 0.0))
+            return lib.dbf2decimal(val, dec)
+
+        def dbf2py_scaled(val, size, dec):
+            return lib.dbf2scaled(val, dec)
+
+        def dbf2py_float(val, size, dec):
+            return float(val.strip() or 0)
+
+        def dbf2py_currency(val, size, dec):
+            return Decimal(val).scaleb(-lib.CURRENCY_DECIMALS)
+
+        def dbf2py_currency_float(val, size, dec):
+            return val / 10**lib.CURRENCY_DECIMALS
+
+        def dbf2py_datetime(val, size, dec):
+            return lib.dbf2datetime(val)
+
+        def dbf2py_flags(val, size, dec):
+            return int.from_bytes(val, "little")
+
+        def dbf2py_memo(val, size, dec):
+            if isinstance(val, int):
+                # block number of Visual FoxPro is binary
+                block = val
+            else:
+                block = int(val.strip() or 0)
+            if not block:
+                return None
+            return memo.Memo(self.memo, block, self.encoding)
+
+        numeric_converters = {
+            "decimal": dbf2py_decimal,
+            "int": dbf2py_scaled,
+            "float": dbf2py_float,
+        }
+        currency_converters = {
+            "decimal": dbf2py_currency,
+            "int": _raw_value,
+            "float": dbf2py_currency_float,
+        }
+        if isinstance(self.numeric_mode, dict):
+            self._checkFieldNames(self.numeric_mode)
+        if isinstance(self.cache_size, dict):
+            self._checkFieldNames(self.cache_size)
+        self._checkFieldNames(self.categorical)
 
         self.action_resolvers = (
             lambda typ, size, dec: (
@@ -114,13 +437,27 @@ class YDbfReader(object):
                 dbf2py_string if (typ == lib.CHAR and not self.encoding) else None
             ),
             lambda typ, size, dec: (
-                dbf2py_decimal if (typ == lib.NUMERAL and dec) else None
+                dbf2py_decimal if (typ in (lib.NUMERAL, lib.FLOAT) and dec) else None
             ),
             lambda typ, size, dec: (
-                dbf2py_integer if (typ == lib.NUMERAL and not dec) else None
+                dbf2py_integer
+                if (typ in (lib.NUMERAL, lib.FLOAT) and not dec)
+                else None
             ),
             lambda typ, size, dec: dbf2py_date if typ == lib.DATE else None,
             lambda typ, size, dec: dbf2py_logic if typ == lib.LOGICAL else None,
+            lambda typ, size, dec: (
+                _raw_value
+                if (typ in (lib.INTEGER, lib.DOUBLE) and lib.binary_format(typ, size))
+                else None
+            ),
+            lambda typ, size, dec: dbf2py_currency if typ == lib.CURRENCY else None,
+            lambda typ, size, dec: dbf2py_datetime if typ == lib.DATETIME else None,
+            lambda typ, size, dec: dbf2py_flags if typ == lib.NULL_FLAGS else None,
+            # binary memo of dBASE is stored the same way as memo
+            lambda typ, size, dec: (
+                dbf2py_memo if typ in (lib.MEMO, lib.DOUBLE) else None
+            ),
         )
         for name, typ, size, dec in self._fields:
             for resolver in self.action_resolvers:
@@ -133,16 +470,110 @@ class YDbfReader(object):
                     "Cannot find dbf-to-python converter "
                     "for field %s (type %s)" % (name, typ)
                 )
+            if action is dbf2py_decimal:
+                self.converters[name] = numeric_converters[self._numericMode(name)]
+            elif action is dbf2py_currency:
+                self.converters[name] = currency_converters[self._numericMode(name)]
+        # unpacked binary ints and doubles (and currency in 'int' numeric mode)
+        # are ready values, decided by type as converters may be wrapped
+        self._raw_fields = frozenset(
+            name
+            for name, typ, size, dec in self._fields
+            if lib.binary_format(typ, size)
+            and (
+                typ in (lib.INTEGER, lib.DOUBLE)
+                or (typ == lib.CURRENCY and self._numericMode(name) == "int")
+            )
+        )
+        self._caches = {}
+        self.categories = {}
+        for name, typ, size, dec in self.fields:
+            if name in self.categorical:
+                if typ != lib.CHAR:
+                    raise ValueError(
+                        "Only char fields may be categorical, "
+                        "but field %s has type %s" % (name, typ)
+                    )
+                self.converters[name] = self._categoricalConverter(name)
+                continue
+            cache_size = self.cache_size
+            if isinstance(cache_size, dict):
+                cache_size = cache_size.get(name)
+            if cache_size and typ in (lib.CHAR, lib.DATE):
+                cached = functools.lru_cache(cache_size)(self.converters[name])
+                self.converters[name] = self._caches[name] = cached
+        if self.stats is not None:
+            for name, typ, size, dec in self.fields:
+                self.converters[name] = ydbf_stats.timed_converter(
+                    self.stats, typ, self.converters[name]
+                )
+        self.field_converters = tuple(
+            (self.converters[name], name, size, dec)
+            for name, typ, size, dec in self._fields
+        )
+        self._decoders = {}
+        self._getDecoder()
+
+    def _numericMode(self, name):
+        """
+        Get mode of conversion of numeral field `name`
+        """
+        mode = self.numeric_mode
+        if isinstance(mode, dict):
+            mode = mode.get(name, "decimal")
+        if mode not in NUMERIC_MODES:
+            raise ValueError(
+                "Wrong numeric mode %r of field %s, should be one of %s"
+                % (mode, name, ", ".join(NUMERIC_MODES))
+            )
+        return mode
+
+    def _categoricalConverter(self, name):
+        """
+        Make converter of char field `name` to codes of its values
+        """
+        conv = self.converters[name]
+        categories = self.categories[name] = []
+        codes = {}  # raw value -> code
+        value_codes = {}  # converted value -> code
+
+        def dbf2py_code(val, size, dec):
+            code = codes.get(val)
+            if code is None:
+                value = conv(val, size, dec)
+                code = value_codes.get(value)
+                if code is None:
+                    code = value_codes[value] = len(categories)
+                    categories.append(value)
+                codes[val] = code
+            return code
+
+        return dbf2py_code
+
+    def cache_info(self):
+        """
+        Get statistics of caches of converters (see `cache_size` option)
+
+        Returns dict where keys are names of fields and values are
+        named tuples (hits, misses, maxsize, currsize).
+        """
+        return dict(
+            (name, cached.cache_info()) for name, cached in self._caches.items()
+        )
 
     def _readHeader(self):
         """
         Read DBF header
         """
-        self.fh.seek(0)
+        if not self.streaming:
+            self.fh.seek(0)
 
+        header = self._read(32)
         sig, year, month, day, numrec, lenheader, recsize, lang = unpack(
-            lib.HEADER_FORMAT, self.fh.read(32)
+            lib.HEADER_FORMAT, header
         )
+        # DBF has production index (.mdx or .cdx)
+        self.has_index = bool(header[lib.INDEX_FLAG_OFFSET] & lib.INDEX_FLAG)
         year = year + 1900
         # some software use 0x08 as 2008 instead of 0x6c
         if year < 1950:
@@ -155,22 +586,34 @@ class YDbfReader(object):
                 "DBF version '%s' (signature %s) not supported" % (version, hex(sig))
             )
 
-        numfields = (lenheader - 33) // 32
+        # header of Visual FoxPro has backlink after fields, so number
+        # of fields is known when terminator is found only
+        maxfields = (lenheader - 33) // 32
         fields = []
-        for fieldno in range(numfields):
-            name, typ, size, deci = unpack(
-                lib.FIELD_DESCRIPTION_FORMAT, self.fh.read(32)
-            )
+        nullable = []
+        terminator = None
+        for fieldno in range(maxfields):
+            first = self._read(1)
+            if first == b"\x0d":
+                terminator = first
+                break
+            description = first + self._read(31)
+            name, typ, size, deci = unpack(lib.FIELD_DESCRIPTION_FORMAT, description)
             name = name.split(b"\0", 1)[0]  # NULL is a end of string
             type_string = typ.decode(lib.SYSTEM_ENCODING)
             name_string = name.decode(lib.SYSTEM_ENCODING)
-            if type_string not in (lib.CHAR, lib.DATE, lib.LOGICAL, lib.NUMERAL):
+            if type_string not in lib.FIELD_TYPES:
                 raise ValueError(
                     "Unknown type {} on field {}".format(type_string, name_string)
                 )
             fields.append((name_string, type_string, size, deci))
+            if sig in lib.VFP_SIGNATURES and (
+                description[lib.FIELD_FLAGS_OFFSET] & lib.FIELD_NULLABLE
+            ):
+                nullable.append(name_string)
 
-        terminator = self.fh.read(1)
+        if terminator is None:
+            terminator = self._read(1)
         if terminator != b"\x0d":
             raise ValueError(
                 "Terminator should be 0x0d. Terminator is a "
@@ -187,14 +630,112 @@ class YDbfReader(object):
             self.fields = self.builtin_fields
             self._fields = self.builtin__fields
         self.raw_lang = lang
-        self.recfmt = "".join(["%ds" % fld[2] for fld in self._fields])
+        self.null_bits = dict((name, bit) for bit, name in enumerate(nullable))
+        self._null_flags = None
+        for name, typ, size, dec in self._fields:
+            if typ == lib.NULL_FLAGS:
+                self._null_flags = name
+        self._formats = {}
+        binary = set()
+        for name, typ, size, dec in self._fields:
+            fmt = lib.binary_format(typ, size)
+            if fmt is not None or typ in lib.BINARY_TYPES:
+                binary.add(name)
+            self._formats[name] = fmt or "%ds" % size
+        self._binary_fields = frozenset(binary)
+        # binary values are little-endian without alignment
+        self._byte_order = "<" if binary else ""
+        self.recfmt = self._byte_order + "".join(
+            self._formats[fld[0]] for fld in self._fields
+        )
         self.recsize = calcsize(self.recfmt)
         self.numrec = numrec
         self.lenheader = lenheader
-        self.numfields = numfields
+        self.numfields = len(fields) - 1
         self.stop_at = numrec
         self.field_names = [fld[0] for fld in self.fields]
 
+    def _openMemo(self):
+        """
+        Open memo file if DBF has memo fields (file itself is opened
+        on first read of memo)
+        """
+        if not any(
+            typ == lib.MEMO or (typ == lib.DOUBLE and not lib.binary_format(typ, size))
+            for name, typ, size, dec in self.fields
+        ):
+            return
+        memo_file = self.memo_file
+        if memo_file is None:
+            filename = getattr(self.fh, "name", None)
+            if isinstance(filename, str):
+                memo_file = memo.memo_path(filename, self.sig)
+        if memo_file is not None:
+            self.memo = memo.open_memo(memo_file, self.sig, self.memo_cache_size)
+
+    def _read(self, size):
+        """
+        Read `size` bytes from current position of file
+
+        In streaming mode short reads are repeated until `size`
+        bytes are read or stream is over.
+        """
+        if not self.streaming:
+            return self.fh.read(size)
+        chunks = []
+        left = size
+        while left > 0:
+            chunk = self.fh.read(left)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            left -= len(chunk)
+        data = b"".join(chunks)
+        self._position += len(data)
+        return data
+
+    def _readAt(self, offset, size):
+        """
+        Read `size` bytes at `offset`
+
+        In streaming mode stream is read forward up to `offset`,
+        io.UnsupportedOperation is raised if it is already passed.
+        """
+        if not self.streaming:
+            self.fh.seek(offset)
+            return self.fh.read(size)
+        if offset < self._position:
+            raise io.UnsupportedOperation(
+                "Cannot read %r backwards in streaming mode" % self.fh
+            )
+        while self._position < offset:
+            if not self._read(min(offset - self._position, self.block_size)):
+                break
+        return self._read(size)
+
+    def _checkSeekable(self, operation):
+        """
+        Raise io.UnsupportedOperation if `operation` is called
+        in streaming mode
+        """
+        if self.streaming:
+            raise io.UnsupportedOperation(
+                "%s is not supported in streaming mode" % operation
+            )
+
+    def _mapFile(self):
+        """
+        Map DBF file into memory (mmap mode)
+        """
+        try:
+            fileno = self.fh.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            raise ValueError(
+                "Cannot use mmap mode for %r: it is not a real file, "
+                "use YDbfReader without `use_mmap` option" % self.fh
+            )
+        self.mm = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
     def _defineEncoding(self):
         self.builtin_encoding = lib.ENCODINGS.get(self.raw_lang, (None,))[0]
         if self.builtin_encoding is None and self.explicit_encoding is None:
@@ -227,7 +768,17 @@ class YDbfReader(object):
         """
         return self.numrec
 
-    def records(self, start_from=None, limit=None, show_deleted=False):
+    def records(
+        self,
+        start_from=None,
+        limit=None,
+        show_deleted=False,
+        fields=None,
+        where=None,
+        row_type="dict",
+        lazy=False,
+        reverse=False,
+    ):
         """
         Iterate over DBF records
 
@@ -239,61 +790,823 @@ class YDbfReader(object):
             `show_deleted`:
                 do not skip deleted records (optional)
                 False by default
+            `fields`:
+                names of fields to read (optional), other fields
+                are skipped without decoding. All fields by default.
+            `where`:
+                condition (or sequence of conditions, all of them should
+                match) from `ydbf.query` (optional). Conditions are checked
+                against raw bytes of fields, so records which don't match
+                are skipped without decoding.
+            `row_type`:
+                type of yielded records: 'dict' (default), 'tuple' (values
+                are ordered as `field_names`), 'namedtuple' or 'slots'
+                (instance of generated class with __slots__). Namedtuple
+                renames fields which names are keywords or start with
+                underscore (e.g. _deletion_flag) to positional names
+                (_0, _1, ...), 'slots' raises ValueError for keywords.
+            `lazy`:
+                yield `LazyRecord` mappings which convert value of field
+                on first access (optional), only 'dict' row type is
+                supported for lazy records. False by default.
+            `reverse`:
+                iterate from the last record of range to the first one
+                (optional), file is read backwards by blocks.
+                False by default.
         """
 
         if start_from is not None:
             self.start_from = start_from
-        offset = self.lenheader + self.recsize * self.start_from
-        if self.fh.tell() != offset:
-            self.fh.seek(offset)
-
         if limit is not None:
             self.stop_at = self.start_from + limit
 
-        converters = tuple(
-            (self.converters[name], name, size, dec)
-            for name, typ, size, dec in self._fields
-        )
-        for i in range(self.start_from, self.stop_at):
-            record = unpack(self.recfmt, self.fh.read(self.recsize))
+        if lazy:
+            if row_type != "dict":
+                raise ValueError("Lazy records support only 'dict' row type")
+            records = self._lazyRecords(show_deleted, fields, where, reverse)
+        else:
+            records = self._decodedRecords(
+                show_deleted, fields, where, row_type, reverse
+            )
+        if self.stats is not None:
+            records = ydbf_stats.count_records(self.stats, records, self.stats_callback)
+        yield from records
+
+    def _decodedRecords(
+        self,
+        show_deleted=False,
+        fields=None,
+        where=None,
+        row_type="dict",
+        reverse=False,
+    ):
+        """
+        Iterate over records decoded by compiled decoder
+        """
+        unpacked = fields
+        if fields is not None and where is not None:
+            unpacked = set(fields) | set(query.where_fields(where))
+        unpacked = self._withNullFlags(unpacked)
+        recfmt = self._projectionFormat(unpacked)
+        decode = self._getDecoder(show_deleted, fields, unpacked, row_type)
+        match = None
+        if where is not None:
+            match = query.compile_where(where, self, self._unpackedNames(unpacked))
+        raw_records = self._rawRecords(self.start_from, self.stop_at, recfmt, reverse)
+        if self.stats is not None:
+            raw_records = ydbf_stats.count_raw(self.stats, raw_records, self.recsize)
+        for i, record in raw_records:
             if not show_deleted and record[0] != b" ":
                 # deleted record
                 continue
             try:
-                yield dict(
-                    (name, conv(val.rstrip(b"\x00"), size, dec))
-                    for (conv, name, size, dec), val in zip(converters, record)
-                    if (name != "_deletion_flag" or show_deleted)
+                if match is not None and not match(record):
+                    continue
+                rec = decode(record)
+            except CONVERSION_ERRORS as err:
+                raise self._conversionError(err, i)
+            yield rec
+
+    def _lazyRecords(self, show_deleted=False, fields=None, where=None, reverse=False):
+        """
+        Iterate over lazy records
+        """
+        layout = self._lazyLayout(show_deleted, fields)
+        match = None
+        if where is not None:
+            where_fields = self._withNullFlags(query.where_fields(where))
+            where_fmt = self._projectionFormat(where_fields)
+            match = query.compile_where(where, self, self._unpackedNames(where_fields))
+        recfmt = "%ds" % self.recsize
+        raw_records = self._rawRecords(self.start_from, self.stop_at, recfmt, reverse)
+        if self.stats is not None:
+            raw_records = ydbf_stats.count_raw(self.stats, raw_records, self.recsize)
+        for i, (raw,) in raw_records:
+            if not show_deleted and raw[:1] != b" ":
+                # deleted record
+                continue
+            if match is not None:
+                try:
+                    matched = match(unpack_from(where_fmt, raw))
+                except CONVERSION_ERRORS as err:
+                    raise self._conversionError(err, i)
+                if not matched:
+                    continue
+            yield LazyRecord(raw, i, layout, self)
+
+    def _lazyLayout(self, show_deleted=False, fields=None):
+        """
+        Make layout of lazy records: dict where keys are names of
+        fields, values are (converter, offset, size, dec, unpack, null),
+        where `unpack` unpacks binary value (None for text values) and
+        `null` is (offset, size, bit) of null flag of nullable field
+        """
+        if fields is not None:
+            self._checkFieldNames(fields)
+        spans = {}  # name -> (offset, size)
+        offset = 0
+        for conv, name, size, dec in self.field_converters:
+            spans[name] = (offset, size)
+            offset += size
+        layout = {}
+        for conv, name, size, dec in self.field_converters:
+            if name == "_deletion_flag":
+                wanted = show_deleted
+            else:
+                wanted = fields is None or name in fields
+            if wanted:
+                unpack = None
+                if name in self._binary_fields:
+                    unpack = Struct("<" + self._formats[name]).unpack_from
+                null = None
+                if name in self.null_bits and self._null_flags in spans:
+                    null = spans[self._null_flags] + (self.null_bits[name],)
+                layout[name] = (conv, spans[name][0], size, dec, unpack, null)
+        return layout
+
+    def _rawRecords(self, start, stop, recfmt=None, reverse=False):
+        """
+        Iterate over raw (not converted) records as (recno, record) pairs
+
+        File is read by blocks of `block_size` bytes, records are unpacked
+        from the block (see `_readRecords`).
+        """
+        if recfmt is None:
+            recfmt = self.recfmt
+        if reverse:
+            yield from self._rawRecordsReversed(start, stop, recfmt)
+            return
+        for first, count, records in self._rawBlocks(start, stop, recfmt, True):
+            yield from enumerate(records, first)
+
+    def _rawBlocks(self, start, stop, recfmt=None, numbered=False):
+        """
+        Iterate over blocks of raw records [start, stop), each block
+        is a list of records of at most `block_size` bytes. If `numbered`
+        is set, (first recno, count, list of records) are given.
+
+        Complete records of the last block of truncated file are given
+        before error.
+        """
+        if recfmt is None:
+            recfmt = self.recfmt
+        block_records = max(1, self.block_size // self.recsize)
+        for first in range(start, stop, block_records):
+            count = min(block_records, stop - first)
+            records, size = self._readRecords(recfmt, first, count)
+            if records:
+                yield (first, len(records), records) if numbered else records
+            if len(records) < count:
+                raise self._truncatedError(first + len(records), size % self.recsize)
+
+    def _rawRecordsReversed(self, start, stop, recfmt):
+        """
+        Iterate over raw records from `stop` - 1 down to `start`
+        """
+        self._checkSeekable("Reverse iteration")
+        block_records = max(1, self.block_size // self.recsize)
+        for last in range(stop, start, -block_records):
+            first = max(start, last - block_records)
+            records, size = self._readRecords(recfmt, first, last - first)
+            if len(records) < last - first:
+                # the last record of truncated file comes first
+                raise self._truncatedError(first + len(records), size % self.recsize)
+            for i in range(len(records) - 1, -1, -1):
+                yield first + i, records[i]
+
+    def _readRecords(self, recfmt, first, count):
+        """
+        Read and unpack `count` raw records from rec #`first`
+
+        Returns list of records and number of read bytes, records cut
+        by the end of file are not unpacked. In mmap mode records are
+        unpacked from memoryview of the mapping, so block isn't copied
+        and the view is released before records are given.
+        """
+        recsize = self.recsize
+        offset = self.lenheader + recsize * first
+        size = recsize * count
+        if self.mm is None:
+            # seek on each block, so random access between blocks is safe
+            block = self._readAt(offset, size)
+            read = len(block)
+            if read < size:
+                block = block[: read - read % recsize]
+            return list(iter_unpack(recfmt, block)), read
+        read = max(0, min(size, len(self.mm) - offset))
+        end = offset + read - read % recsize
+        with memoryview(self.mm)[offset:end] as block:
+            return list(iter_unpack(recfmt, block)), read
+
+    def tail(self, n, **options):
+        """
+        Get list of `n` last records (deleted are skipped)
+
+        Records are in order of file, but file is read backwards from
+        its end, so the front of file is not read at all.
+
+        Args:
+            `n`:
+                number of records
+            `options`:
+                options for `records`, e.g. `fields` or `where`
+        """
+        records = self.records(start_from=0, limit=self.numrec, reverse=True, **options)
+        result = list(itertools.islice(records, n))
+        result.reverse()
+        return result
+
+    def _readRecord(self, recno):
+        """
+        Read raw (not converted) record by its number
+        """
+        self._checkSeekable("Random access")
+        offset = self.lenheader + self.recsize * recno
+        if self.mm is not None:
+            return unpack_from(self.recfmt, self.mm, offset)
+        # keep position of file, so running records() isn't disturbed
+        pos = self.fh.tell()
+        self.fh.seek(offset)
+        try:
+            return unpack(self.recfmt, self.fh.read(self.recsize))
+        finally:
+            self.fh.seek(pos)
+
+    def _convertRecord(self, record, recno, show_deleted=False):
+        """
+        Convert raw record to dict
+        """
+        try:
+            return self._getDecoder(show_deleted)(record)
+        except CONVERSION_ERRORS as err:
+            raise self._conversionError(err, recno)
+
+    def _truncatedError(self, recno, size):
+        """
+        Make exception for rec #`recno` cut by the end of file,
+        only `size` bytes of it are read
+        """
+        return self._conversionError(
+            ValueError(
+                "file is truncated, %d of %d bytes of record are read"
+                % (size, self.recsize)
+            ),
+            recno,
+        )
+
+    def _conversionError(self, err, recno):
+        """
+        Make informative exception from error occured while
+        converting rec #`recno`
+        """
+        if isinstance(err, UnicodeDecodeError):
+            args = list(err.args[:-1]) + [
+                "Error occured while reading rec #%d. You are "
+                "using YDbfReader with unicode-related options: "
+                "actual encoding %s, builtin DBF encoding %s (raw lang "
+                "code %s), manually set encoding is %s. Probably, data "
+                "in DBF file is not encoded with %s encoding, so you "
+                "should manually define encoding by setting up `encoding` "
+                "option"
+                % (
+                    recno,
+                    self.encoding,
+                    self.builtin_encoding,
+                    hex(self.raw_lang),
+                    self.explicit_encoding,
+                    self.encoding,
                 )
-            except UnicodeDecodeError as err:
-                args = list(err.args[:-1]) + [
-                    "Error occured while reading rec #%d. You are "
-                    "using YDbfReader with unicode-related options: "
-                    "actual encoding %s, builtin DBF encoding %s (raw lang "
-                    "code %s), manually set encoding is %s. Probably, data "
-                    "in DBF file is not encoded with %s encoding, so you "
-                    "should manually define encoding by setting up `encoding` "
-                    "option"
-                    % (
-                        i,
-                        self.encoding,
-                        self.builtin_encoding,
-                        hex(self.raw_lang),
-                        self.explicit_encoding,
-                        self.encoding,
-                    )
-                ]
-                raise UnicodeDecodeError(*args)
-            except (IndexError, ValueError, TypeError, KeyError) as err:
-                raise RuntimeError(
-                    "Error occured (%s: %s) while reading rec "
-                    "#%d" % (err.__class__.__name__, err, i)
+            ]
+            return UnicodeDecodeError(*args)
+        return RuntimeError(
+            "Error occured (%s: %s) while reading rec "
+            "#%d" % (err.__class__.__name__, err, recno)
+        )
+
+    def _checkFieldNames(self, fields):
+        """
+        Check that all `fields` are known, raise ValueError if not
+        """
+        unknown = set(fields) - set(self.field_names)
+        if unknown:
+            raise ValueError("Unknown fields: %s" % ", ".join(sorted(unknown)))
+
+    def _projectionFormat(self, fields=None):
+        """
+        Make struct-format of record which unpacks only deletion flag
+        and `fields`, other fields are skipped as pad bytes
+        """
+        if fields is None:
+            return self.recfmt
+        self._checkFieldNames(fields)
+        parts = []
+        skipped = 0
+        for name, typ, size, dec in self._fields:
+            if name == "_deletion_flag" or name in fields:
+                if skipped:
+                    parts.append("%dx" % skipped)
+                    skipped = 0
+                parts.append(self._formats[name])
+            else:
+                skipped += size
+        if skipped:
+            parts.append("%dx" % skipped)
+        return self._byte_order + "".join(parts)
+
+    def _unpackedNames(self, fields=None):
+        """
+        Names of values in record unpacked by `_projectionFormat(fields)`
+        """
+        return [
+            name
+            for name, typ, size, dec in self._fields
+            if fields is None or name == "_deletion_flag" or name in fields
+        ]
+
+    def _withNullFlags(self, fields=None):
+        """
+        Add field of null flags to `fields` if some of them are nullable
+        """
+        if fields is None or self._null_flags is None:
+            return fields
+        if not self.null_bits.keys() & set(fields):
+            return fields
+        return set(fields) | set([self._null_flags])
+
+    def _getDecoder(
+        self, show_deleted=False, fields=None, unpacked=None, row_type="dict"
+    ):
+        """
+        Get (compile if needed) decoder of raw records
+        """
+        if unpacked is None:
+            unpacked = fields
+        key = (
+            bool(show_deleted),
+            None if fields is None else frozenset(fields),
+            None if unpacked is None else frozenset(unpacked),
+            row_type,
+        )
+        decoder = self._decoders.get(key)
+        if decoder is None:
+            decoder = self._decoders[key] = self._makeDecoder(
+                show_deleted, fields, unpacked, row_type
+            )
+        return decoder
+
+    def _makeDecoder(
+        self, show_deleted=False, fields=None, unpacked=None, row_type="dict"
+    ):
+        """
+        Compile function which converts raw record to `row_type`
+
+        Source of the function is generated from fields structure,
+        so each record is converted by single straight-line call
+        instead of looping over converters. If `fields` are set,
+        decoder expects record unpacked by `_projectionFormat(unpacked)`
+        (`unpacked` defaults to `fields`) and converts only `fields`.
+        """
+        if row_type not in ROW_TYPES:
+            raise ValueError(
+                "Wrong row type %r, use one of: %s" % (row_type, ", ".join(ROW_TYPES))
+            )
+        if unpacked is None:
+            unpacked = fields
+        names = set(self._unpackedNames(unpacked))
+        # nullable fields are checked only if null flags are unpacked
+        null_bits = self.null_bits if self._null_flags in names else {}
+        namespace = {"from_bytes": int.from_bytes}
+        values = []
+        items = []
+        row_names = []
+        prologue = ""
+        field_converters = [fc for fc in self.field_converters if fc[1] in names]
+        for pos, (conv, name, size, dec) in enumerate(field_converters):
+            values.append("v%d" % pos)
+            if null_bits and name == self._null_flags:
+                prologue = '    nulls = from_bytes(v%d, "little")\n' % pos
+            if name == "_deletion_flag" and not show_deleted:
+                continue
+            if fields is not None and name != "_deletion_flag" and name not in fields:
+                continue
+            row_names.append(name)
+            if name in self._raw_fields:
+                # binary value is ready, no call is needed
+                item = "v%d" % pos
+            else:
+                namespace["c%d" % pos] = conv
+                if name in self._binary_fields:
+                    item = "c%d(v%d, %d, %d)" % (pos, pos, size, dec)
+                else:
+                    item = 'c%d(v%d.rstrip(b"\\x00"), %d, %d)' % (pos, pos, size, dec)
+            if name in null_bits:
+                item = "(None if nulls >> %d & 1 else %s)" % (null_bits[name], item)
+            items.append(item)
+        if row_type == "dict":
+            row = "{%s}" % ", ".join(
+                "%r: %s" % (name, item) for name, item in zip(row_names, items)
+            )
+        elif row_type == "tuple":
+            row = "(%s)" % "".join(item + ", " for item in items)
+        else:
+            namespace["row_class"] = self._rowClass(row_type, row_names)
+            namespace["new"] = namespace["row_class"]._make
+            row = "new((%s))" % "".join(item + ", " for item in items)
+        source = "def decode(record):\n    %s, = record\n%s    return %s\n" % (
+            ", ".join(values),
+            prologue,
+            row,
+        )
+        exec(compile(source, "<ydbf decoder>", "exec"), namespace)
+        return namespace["decode"]
+
+    def _rowClass(self, row_type, names):
+        """
+        Get (generate if needed) class of records for 'namedtuple'
+        or 'slots' row type
+        """
+        key = (row_type, tuple(names))
+        row_class = self._row_classes.get(key)
+        if row_class is None:
+            if row_type == "namedtuple":
+                # invalid names of namedtuple's fields (keywords, names
+                # starting with underscore, e.g. _deletion_flag) are renamed
+                # to positional names (_N)
+                row_class = namedtuple("Record", names, rename=True)
+            else:
+                row_class = _make_slots_class("Record", names)
+            self._row_classes[key] = row_class
+        return row_class
+
+    def __getitem__(self, key):
+        """
+        Get record (or list of records for slice) by its number
+
+        Records are addressed physically, i.e. the same way as `len`
+        counts them: deleted records are returned as well.
+        """
+        if isinstance(key, slice):
+            return [
+                self._convertRecord(self._readRecord(i), i)
+                for i in range(*key.indices(self.numrec))
+            ]
+        recno = operator.index(key)
+        if recno < 0:
+            recno += self.numrec
+        if not 0 <= recno < self.numrec:
+            raise IndexError("Record #%d is out of range" % key)
+        return self._convertRecord(self._readRecord(recno), recno)
+
+    def get(self, recno, default=None):
+        """
+        Get record by its number
+
+        Args:
+            `recno`:
+                number of record (zero-based)
+            `default`:
+                value to return if there is no such record
+                or record is deleted, None by default
+        """
+        if not 0 <= recno < self.numrec:
+            return default
+        record = self._readRecord(recno)
+        if record[0] != b" ":
+            # deleted record
+            return default
+        return self._convertRecord(record, recno)
+
+    def aggregate(self, spec, where=None, start_from=0, limit=None):
+        """
+        Compute aggregates of numeric fields (see `ydbf.aggregate`)
+
+        Only fields of `spec` (and of `where`) are unpacked, their raw
+        values are parsed to ints scaled by number of decimal digits,
+        records are not converted. Deleted records are skipped.
+
+        Args:
+            `spec`:
+                dict {NAME: aggregate}, where aggregate is 'sum', 'min',
+                'max', 'count', 'avg' or tuple of them, '*' as NAME
+                counts records
+            `where`:
+                condition (or sequence of conditions) from `ydbf.query`
+                (optional)
+            `start_from`:
+                index of record start from, 0 by default
+            `limit`:
+                limits number of aggregated records (optional)
+
+        Returns dict {NAME: result}, result is a tuple if tuple
+        of aggregates is given.
+        """
+        stop = self.numrec
+        if limit is not None:
+            stop = min(stop, start_from + limit)
+        return ydbf_aggregate.aggregate(self, spec, where, start_from, stop)
+
+    def count_live(self):
+        """
+        Count records which are not deleted
+
+        Only deletion flags (first byte of each record) are read,
+        records are not unpacked nor converted.
+        """
+        return sum(flags.count(b" ") for flags in self._deletionFlags())
+
+    def deletion_bitmap(self):
+        """
+        Get bitmap (bytearray) of deleted records
+
+        Record N is deleted if bit N % 8 of byte N // 8 is set, i.e.
+        `bool(bitmap[n >> 3] >> (n & 7) & 1)`. Only deletion flags
+        are read, records are not unpacked nor converted.
+        """
+        return lib.flags2bitmap(b"".join(self._deletionFlags()), DELETED_FLAGS)
+
+    def _deletionFlags(self):
+        """
+        Iterate over blocks of deletion flags, one byte per record
+
+        Flags are strided slices of mapping (in mmap mode)
+        or of blocks of `block_size` bytes.
+        """
+        recsize = self.recsize
+        end = self.lenheader + recsize * self.numrec
+        if self.mm is not None:
+            yield self.mm[self.lenheader : end : recsize]
+            return
+        step = recsize * max(1, self.block_size // recsize)
+        for offset in range(self.lenheader, end, step):
+            yield self._readAt(offset, min(step, end - offset))[::recsize]
+
+    def lookup(self, field, key, index_file=None):
+        """
+        Get list of records where value of `field` is equal to `key`
+
+        Records are found by sidecar index of field (see `ydbf.index`),
+        which should be built beforehand, and read by their numbers.
+
+        Args:
+            `field`:
+                name of field
+            `key`:
+                value of field
+            `index_file`:
+                name of index file, by default it is derived from
+                name of DBF file
+        """
+        idx = self._getIndex(field, index_file)
+        key = index.value_key(self, query._field_spec(self, field), key)
+        if key is None:
+            return []
+        return list(self._liveRecords(idx.recnos(key, key)))
+
+    def range(self, field, low=None, high=None, index_file=None):
+        """
+        Iterate over records where value of `field` is between `low` and
+        `high` (both inclusive, None means unbounded) in order of values
+
+        Records are found by sidecar index of field (see `ydbf.index`),
+        which should be built beforehand, and read by their numbers.
+        """
+        idx = self._getIndex(field, index_file)
+        spec = query._field_spec(self, field)
+        if low is not None:
+            low = index.value_key(self, spec, low, bound="low")
+        if high is not None:
+            high = index.value_key(self, spec, high, bound="high")
+        yield from self._liveRecords(idx.recnos(low, high))
+
+    def records_by_index(self, idx, low=None, high=None):
+        """
+        Iterate over records in order of native index (see
+        `ydbf.native_index`), deleted records are skipped
+
+        Args:
+            `idx`:
+                NDX index, MDX or CDX tag
+            `low`, `high`:
+                values of key (both inclusive, None means unbounded)
+        """
+        encoding = self.encoding or lib.SYSTEM_ENCODING
+        if low is not None:
+            low = idx.key(low, encoding)
+        if high is not None:
+            high = idx.key(high, encoding)
+        yield from self._liveRecords(idx.recnos(low, high))
+
+    def _liveRecords(self, recnos):
+        """
+        Read records by their numbers, deleted records are skipped
+        (record may be deleted after index is built)
+        """
+        for recno in recnos:
+            record = self._readRecord(recno)
+            if record[0] == b" ":
+                yield self._convertRecord(record, recno)
+
+    def _getIndex(self, field, index_file=None):
+        """
+        Get (open if needed) index of `field`
+        """
+        if index_file is None:
+            name = getattr(self.fh, "name", None)
+            if not isinstance(name, str):
+                raise ValueError(
+                    "Cannot find index of field %s for %r, "
+                    "set name of index file explicitly" % (field, self.fh)
                 )
+            index_file = index.index_path(name, field)
+        idx = self._indexes.get(index_file)
+        if idx is None:
+            idx = index.Index(index_file)
+            try:
+                idx.check(self)
+            except ValueError:
+                idx.close()
+                raise
+            self._indexes[index_file] = idx
+        if idx.field != field:
+            raise ValueError("%s is index of field %s" % (index_file, idx.field))
+        return idx
+
+    def read_columns(self, fields=None, start=0, limit=None, dates="ordinal"):
+        """
+        Read DBF data as columns
+
+        Records are not converted one by one, raw values are collected
+        to columns by blocks and each column is converted at once.
+        Deleted records are skipped.
+
+        Returns dict where keys are names of fields and values
+        are columns:
+            - array.array('q') for numerals without decimal part and
+              integers, array.array('d') for doubles
+            - array.array('d') for numerals with decimal part, or
+              array.array('q') of scaled ints if `numeric_mode` of
+              field is 'int'
+            - list of (interned) strings for chars, or
+              array.array('q') of codes for categorical chars
+            - array.array('q') of ordinals (see `datetime.date.toordinal`)
+              for dates, empty date is 0. If `dates` option is set to
+              'datetime64', numpy array of dtype datetime64[D] is returned
+              instead, empty date is NaT.
+            - bitmap (bytearray) for logicals, value of record N is a bit
+              N % 8 of byte N // 8, i.e. `bool(col[n >> 3] >> (n & 7) & 1)`
+
+        Null values of nullable fields (Visual FoxPro) are None in lists,
+        NaN in arrays of doubles, 0 (empty) in other arrays and false
+        in bitmaps.
+
+        Args:
+            `fields`:
+                names of fields to read, all fields by default
+            `start`:
+                index of record start from, 0 by default
+            `limit`:
+                limits number of read records (optional)
+            `dates`:
+                'ordinal' (default) or 'datetime64' (requires numpy)
+        """
+        if dates not in ("ordinal", "datetime64"):
+            raise ValueError("Wrong dates option %r" % dates)
+        if fields is None:
+            fields = self.field_names
+        unpacked = self._withNullFlags(fields)
+        recfmt = self._projectionFormat(unpacked)
+        names = self._unpackedNames(unpacked)
+        specs = [fld for fld in self.fields if fld[0] in fields]
+        builders = [self._columnBuilder(*fld) for fld in specs]
+
+        stop = self.numrec if limit is None else min(self.numrec, start + limit)
+        chunk = []
+        chunk_size = max(1, self.block_size // self.recsize)
+        raw_records = self._rawRecords(start, stop, recfmt)
+        while True:
+            del chunk[:]
+            for i, record in raw_records:
+                if record[0] == b" ":
+                    chunk.append(record)
+                    if len(chunk) == chunk_size:
+                        break
+            if not chunk:
+                break
+            # transpose chunk: raw values of each field in separate tuple
+            raw_columns = dict(zip(names, zip(*chunk)))
+            flags = None
+            if self._null_flags in raw_columns:
+                flags = [
+                    int.from_bytes(val, "little")
+                    for val in raw_columns[self._null_flags]
+                ]
+            for (name, typ, size, dec), (column, extend) in zip(specs, builders):
+                values = raw_columns[name]
+                nulls = None
+                if flags is not None and name in self.null_bits:
+                    bit = self.null_bits[name]
+                    nulls = [i for i, value in enumerate(flags) if value >> bit & 1]
+                if nulls and typ == lib.LOGICAL:
+                    values = list(values)
+                    for i in nulls:
+                        values[i] = b" "
+                    nulls = None
+                offset = len(column)
+                try:
+                    extend(values)
+                except CONVERSION_ERRORS as err:
+                    raise RuntimeError(
+                        "Error occured (%s: %s) while reading field %s"
+                        % (err.__class__.__name__, err, name)
+                    )
+                if nulls:
+                    _fill_nulls(column, offset, nulls)
+
+        result = {}
+        for (name, typ, size, dec), (column, extend) in zip(specs, builders):
+            if typ == lib.LOGICAL:
+                column = lib.flags2bitmap(b"".join(column), b"YyTt")
+            elif typ == lib.DATE and dates == "datetime64":
+                column = arrays.ordinals(column)
+            result[name] = column
+        return result
+
+    def _columnBuilder(self, name, typ, size, dec):
+        """
+        Make column for `read_columns` and function which converts
+        raw values of field and appends them to the column
+        """
+        if typ == lib.LOGICAL:
+            # raw flags are packed to bitmap at the end
+            column = []
+            return column, lambda values: column.append(b"".join(values))
+        conv = self.converters[name]
+        if name in self._raw_fields:
+            # binary ints and doubles, including currency in 'int' numeric mode
+            column = array.array("d" if typ == lib.DOUBLE else "q")
+            return column, column.extend
+        if name in self._binary_fields:
+            column = []
+            return column, lambda values: column.extend(
+                conv(val, size, dec) for val in values
+            )
+        if typ in (lib.NUMERAL, lib.FLOAT) and dec and self._numericMode(name) == "int":
+            column = array.array("q")
+            return column, lambda values: column.extend(
+                lib.dbf2scaled(val.rstrip(b"\x00"), dec) for val in values
+            )
+        if typ in (lib.NUMERAL, lib.FLOAT):
+            column = array.array("d" if dec else "q")
+            number = float if dec else int
+            return column, lambda values: column.extend(
+                number(val.rstrip(b"\x00").strip() or 0) for val in values
+            )
+        if typ == lib.DATE:
+            column = array.array("q")
+            dbf2date = self.dbf2date
+
+            def extend(values):
+                dates = [dbf2date(val.rstrip(b"\x00")) for val in values]
+                column.extend(dt.toordinal() if dt else 0 for dt in dates)
+
+            return column, extend
+        if name in self.categories:
+            column = array.array("q")
+            return column, lambda values: column.extend(
+                conv(val.rstrip(b"\x00"), size, dec) for val in values
+            )
+        column = []
+        return column, lambda values: column.extend(
+            _intern(conv(val.rstrip(b"\x00"), size, dec)) for val in values
+        )
+
+    def to_numpy_raw(self):
+        """
+        Get numpy array of raw records (requires numpy)
+
+        The array has structured dtype where each field is a bytes
+        column, it is a view over memory-mapped file, so no data is
+        read until it is used. See `ydbf.arrays` for converters of
+        columns.
+        """
+        return arrays.to_numpy_raw(self)
 
     def read(self):
         return self.records()
 
     def close(self):
+        for idx in self._indexes.values():
+            idx.close()
+        self._indexes = {}
+        if self.memo is not None:
+            self.memo.close()
+        if self.mm is not None:
+            try:
+                self.mm.close()
+            except BufferError:
+                # numpy arrays made by to_numpy_raw are still alive,
+                # mapping is closed when they are released
+                pass
         return self.fh.close()
 
     def __enter__(self):
@@ -0,0 +1,125 @@
+# encoding: utf-8
+# YDbf - Pythonic reader and writer for DBF/XBase files
+#
+# Copyright (C) 2006-2021 Yury Yurevich and contributors
+#
+# https://github.com/y10h/ydbf
+"""
+Statistics of reading and writing DBF
+
+Statistics are opt-in, reader and writer collect them if `stats`
+option is set:
+
+    dbf = ydbf.open('big.dbf', stats=True, stats_callback=export)
+    for rec in dbf:
+        ...
+    print(dbf.stats.records_per_second, dbf.stats.converter_time)
+
+When statistics are off, records are read and written the usual
+way, without any counters.
+"""
+
+import time
+
+
+class Stats(object):
+    """
+    Counters of reader or writer
+    """
+
+    def __init__(self):
+        self.bytes = 0  # bytes of records read or written
+        self.records = 0  # records yielded or written
+        self.deleted = 0  # deleted records read
+        self.elapsed = 0.0  # seconds spent in reader or writer
+        self.converter_time = {}  # type of field -> seconds spent in converters
+
+    @property
+    def records_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.records / self.elapsed
+
+    def as_dict(self):
+        """
+        Get counters as dict (e.g. for export to metrics system)
+        """
+        return {
+            "bytes": self.bytes,
+            "records": self.records,
+            "deleted": self.deleted,
+            "elapsed": self.elapsed,
+            "records_per_second": self.records_per_second,
+            "converter_time": dict(self.converter_time),
+        }
+
+    def __repr__(self):
+        return "Stats(%r)" % self.as_dict()
+
+
+def make_stats(stats, callback=None):
+    """
+    Get Stats instance for `stats` option of reader or writer,
+    None if statistics are off
+
+    Args:
+        `stats`:
+            True or Stats instance to turn statistics on
+        `callback`:
+            function which gets statistics, turns them on as well
+    """
+    if isinstance(stats, Stats):
+        return stats
+    if stats or callback is not None:
+        return Stats()
+    return None
+
+
+def timed_converter(stats, typ, conv):
+    """
+    Wrap converter `conv` of field of type `typ`, so time spent
+    in it is added to `stats.converter_time[typ]`
+    """
+    timer = time.perf_counter
+    times = stats.converter_time
+    times.setdefault(typ, 0.0)
+
+    def timed(val, size, dec):
+        started = timer()
+        try:
+            return conv(val, size, dec)
+        finally:
+            times[typ] += timer() - started
+
+    return timed
+
+
+def count_raw(stats, raw_records, recsize):
+    """
+    Count bytes and deleted records of raw (recno, record) pairs
+    """
+    for i, record in raw_records:
+        stats.bytes += recsize
+        if record[0][:1] != b" ":
+            stats.deleted += 1
+        yield i, record
+
+
+def count_records(stats, records, callback=None):
+    """
+    Count records and time spent to get them, `callback` gets
+    `stats` when `records` are over
+    """
+    timer = time.perf_counter
+    while True:
+        started = timer()
+        try:
+            rec = next(records)
+        except StopIteration:
+            break
+        finally:
+            stats.elapsed += timer() - started
+        stats.records += 1
+        yield rec
+    if callback is not None:
+        callback(stats)
@@ -8,16 +8,36 @@
 Unit-tests for YDbf
 """
 
+import array
 import datetime
 import decimal
 import io
+import operator
 import os
+import shutil
+import struct
 import tempfile
 import unittest
+import zipfile
+from unittest import mock
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 import ydbf
+from ydbf import aggregate
+from ydbf import arrays
+from ydbf import compression as ydbf_compression
 from ydbf import dump
+from ydbf import index
 from ydbf import lib
+from ydbf import memo
+from ydbf import native_index
+from ydbf import parallel
+from ydbf import query
+from ydbf import stats as ydbf_stats
 
 
 _TEST_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "testdata"))
@@ -60,6 +80,33 @@ def testdata(filename=None, mode="rb"):
     return testrunner
 
 
+def _int_values(records):
+    return [rec["INT_FLD"] for rec in records]
+
+
+def _ids(records):
+    return [rec["ID"] for rec in records]
+
+
+class _Stream(io.RawIOBase):
+    """
+    Non-seekable stream which returns data by small chunks
+    """
+
+    def __init__(self, data, chunk_size=7):
+        self.data = data
+        self.chunk_size = chunk_size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        size = min(len(buf), self.chunk_size, len(self.data))
+        buf[:size] = self.data[:size]
+        self.data = self.data[size:]
+        return size
+
+
 class TestDateConverters(unittest.TestCase):
     def test_dbf2date(self):
         self.assertEqual(lib.dbf2date(b""), None)
@@ -97,6 +144,41 @@ class TestDateConverters(unittest.TestCase):
         with self.assertRaises(ValueError):
             lib.str2dbf("06/05/2006")
 
+    def test_dbf2scaled(self):
+        self.assertEqual(lib.dbf2scaled(b" 12.34", 2), 1234)
+        self.assertEqual(lib.dbf2scaled(b"     ", 2), 0)
+        self.assertEqual(lib.dbf2scaled(b"5.2  ", 2), 520)
+        self.assertEqual(lib.dbf2scaled(b"  -5", 2), -500)
+        self.assertEqual(lib.dbf2scaled(b"1.235", 2), 124)
+        self.assertEqual(lib.dbf2scaled(b"  .5", 0), 1)
+        self.assertEqual(lib.dbf2scaled(b"1234567890123456.78", 2), 123456789012345678)
+        for wrong in (b"foo", b"-", b".", b"1.2.3", b"1 2"):
+            with self.assertRaises(ValueError):
+                lib.dbf2scaled(wrong, 2)
+
+    def test_dbf2decimal(self):
+        self.assertEqual(lib.dbf2decimal(b"   ", 2), decimal.Decimal("0.00"))
+        self.assertEqual(lib.dbf2decimal(b" -5.2", 2), decimal.Decimal("-5.20"))
+        self.assertEqual(lib.dbf2decimal(b"1.235", 2), decimal.Decimal("1.24"))
+        self.assertEqual(
+            lib.dbf2decimal(b"9999999999999999.99", 2),
+            decimal.Decimal("9999999999999999.99"),
+        )
+        for wrong in (b"foo", b"-", b".", b"1.2.3"):
+            with self.assertRaises(ValueError):
+                lib.dbf2decimal(wrong, 2)
+        # values without point are quantized as well
+        self.assertEqual(str(lib.dbf2decimal(b"12", 2)), "12.00")
+        self.assertEqual(str(lib.dbf2decimal(b"1", 1)), "1.0")
+        self.assertEqual(str(lib.dbf2decimal(b" 1.5", 1)), "1.5")
+
+    def test_flags2bitmap(self):
+        self.assertEqual(lib.flags2bitmap(b"", b"T"), bytearray())
+        self.assertEqual(lib.flags2bitmap(b"TFT", b"T"), bytearray(b"\x05"))
+        self.assertEqual(
+            lib.flags2bitmap(b"FFFFFFFFtY", b"TtYy"), bytearray(b"\x00\x03")
+        )
+
     def test_olddates(self):
         """
         Check that we can convert dates older than 1901
@@ -267,6 +349,427 @@ class TestYDbfReader(unittest.TestCase):
         with self.assertRaises(ValueError):
             ydbf.YDbfReader(fh)
 
+    @testdata("simple.dbf")
+    def test_mmap(self, fh):
+        reference_data = list(ydbf.YDbfReader(fh).records(show_deleted=True))
+        live_data = list(ydbf.YDbfReader(fh))
+        dbf = ydbf.YDbfReader(fh, use_mmap=True)
+        self.assertIsNotNone(dbf.mm)
+        self.assertEqual(list(dbf.records(show_deleted=True)), reference_data)
+        self.assertEqual(list(dbf.records(start_from=1)), live_data[1:])
+        dbf.close()
+        self.assertTrue(fh.closed)
+
+    @testdata("simple.dbf")
+    def test_block_size(self, fh):
+        reference_data = list(ydbf.YDbfReader(fh).records(show_deleted=True))
+        # one record per block, two records per block, and a block bigger
+        # than the whole file
+        for block_size in (1, 50, 1024):
+            dbf = ydbf.YDbfReader(fh, block_size=block_size)
+            self.assertEqual(list(dbf.records(show_deleted=True)), reference_data)
+            self.assertEqual(
+                list(dbf.records(start_from=1, limit=2, show_deleted=True)),
+                reference_data[1:3],
+            )
+
+    @testdata("simple.dbf")
+    def test_projection(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        self.assertEqual(dbf._projectionFormat(["CHR_FLD"]), "1s9x6s9x")
+        self.assertEqual(dbf._projectionFormat(["INT_FLD", "BLN_FLD"]), "1s4s19x1s")
+        self.assertEqual(
+            list(dbf.records(fields=["CHR_FLD", "INT_FLD"])),
+            [{"INT_FLD": 25, "CHR_FLD": "test"}, {"INT_FLD": 113, "CHR_FLD": "del"}],
+        )
+        self.assertEqual(
+            list(dbf.records(show_deleted=True, fields=("BLN_FLD",))),
+            [
+                {"_deletion_flag": "", "BLN_FLD": True},
+                {"_deletion_flag": "", "BLN_FLD": False},
+                {"_deletion_flag": "*", "BLN_FLD": True},
+            ],
+        )
+        with self.assertRaises(ValueError):
+            list(dbf.records(fields=["INT_FLD", "NO_FLD"]))
+
+    @testdata("simple.dbf")
+    def test_where(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+
+        def int_values(where, **kwargs):
+            records = dbf.records(start_from=0, where=where, **kwargs)
+            return [rec["INT_FLD"] for rec in records]
+
+        self.assertEqual(int_values(query.eq("CHR_FLD", "del")), [113])
+        self.assertEqual(int_values(query.eq("CHR_FLD", "de")), [])
+        self.assertEqual(int_values(query.eq("INT_FLD", 25)), [25])
+        self.assertEqual(int_values(query.eq("FLT_FLD", "12.34")), [25])
+        self.assertEqual(int_values(query.eq("FLT_FLD", 1.01)), [113])
+        self.assertEqual(int_values(query.eq("BLN_FLD", False)), [113])
+        self.assertEqual(int_values(query.prefix("CHR_FLD", "te")), [25])
+        self.assertEqual(int_values(query.isin("CHR_FLD", ["del", "ex."])), [113])
+        self.assertEqual(
+            int_values(query.isin("CHR_FLD", ["del", "ex."]), show_deleted=True),
+            [113, 7436],
+        )
+        self.assertEqual(
+            int_values(query.between("DTE_FLD", datetime.date(2006, 6, 1))), [113]
+        )
+        self.assertEqual(
+            int_values(query.between("FLT_FLD", decimal.Decimal("0.5"), 12.34)),
+            [25, 113],
+        )
+        self.assertEqual(
+            int_values(
+                [query.between("INT_FLD", 100, None), query.prefix("CHR_FLD", "d")]
+            ),
+            [113],
+        )
+        # condition on field which is not read
+        self.assertEqual(
+            list(dbf.records(fields=["CHR_FLD"], where=query.eq("INT_FLD", 113))),
+            [{"CHR_FLD": "del"}],
+        )
+        with self.assertRaises(ValueError):
+            int_values(query.prefix("INT_FLD", "1"))
+        with self.assertRaises(ValueError):
+            int_values(query.eq("NO_FLD", "1"))
+
+    @testdata("simple.dbf")
+    def test_row_type(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        reference_data = list(dbf.records(start_from=0))
+        values = [
+            tuple(rec[name] for name in dbf.field_names) for rec in reference_data
+        ]
+        self.assertEqual(list(dbf.records(start_from=0, row_type="tuple")), values)
+        for row_type in ("namedtuple", "slots"):
+            records = list(dbf.records(start_from=0, row_type=row_type))
+            self.assertEqual([tuple(rec) for rec in records], values)
+            self.assertEqual(records[1].CHR_FLD, "del")
+            self.assertEqual(records[0]._asdict(), reference_data[0])
+            self.assertEqual(records[0]._fields, tuple(dbf.field_names))
+            self.assertIs(type(records[0]), type(records[1]))
+        self.assertEqual(
+            list(dbf.records(row_type="tuple", fields=["CHR_FLD"], show_deleted=True)),
+            [("", "test"), ("", "del"), ("*", "ex.")],
+        )
+        record = next(
+            dbf.records(start_from=0, row_type="slots", fields=["CHR_FLD", "INT_FLD"])
+        )
+        self.assertEqual(repr(record), "Record(INT_FLD=25, CHR_FLD='test')")
+        with self.assertRaises(AttributeError):
+            record.FLT_FLD
+        with self.assertRaises(ValueError):
+            list(dbf.records(row_type="list"))
+        # lowercase names of fields may be keywords
+        self.assertEqual(
+            dbf._rowClass("namedtuple", ["from", "ID"])._fields, ("_0", "ID")
+        )
+        with self.assertRaises(ValueError):
+            dbf._rowClass("slots", ["from", "ID"])
+
+    @testdata("simple.dbf")
+    def test_lazy(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        reference_data = list(dbf.records(start_from=0, show_deleted=True))
+        records = list(dbf.records(start_from=0, show_deleted=True, lazy=True))
+        self.assertEqual(records, reference_data)
+        record = next(dbf.records(start_from=0, lazy=True))
+        self.assertIsInstance(record, ydbf.reader.LazyRecord)
+        self.assertEqual(record._values, {})
+        self.assertEqual(record["CHR_FLD"], "test")
+        self.assertEqual(record._values, {"CHR_FLD": "test"})
+        self.assertEqual(len(record), 5)
+        self.assertNotIn("_deletion_flag", record)
+        self.assertIn("INT_FLD", record)
+        # membership doesn't convert values
+        self.assertEqual(record._values, {"CHR_FLD": "test"})
+        with self.assertRaises(KeyError):
+            record["NO_FLD"]
+        records = dbf.records(
+            start_from=0,
+            fields=["INT_FLD"],
+            where=query.eq("CHR_FLD", "del"),
+            lazy=True,
+        )
+        self.assertEqual(list(records), [{"INT_FLD": 113}])
+        with self.assertRaises(ValueError):
+            list(dbf.records(lazy=True, row_type="tuple"))
+
+    @testdata("simple.dbf")
+    def test_read_columns(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        columns = dbf.read_columns()
+        self.assertEqual(list(columns), dbf.field_names)
+        self.assertEqual(columns["INT_FLD"].typecode, "q")
+        self.assertEqual(list(columns["INT_FLD"]), [25, 113])
+        self.assertEqual(columns["FLT_FLD"].typecode, "d")
+        self.assertEqual(list(columns["FLT_FLD"]), [12.34, 1.01])
+        self.assertEqual(columns["CHR_FLD"], ["test", "del"])
+        self.assertEqual(
+            list(columns["DTE_FLD"]),
+            [
+                datetime.date(2006, 5, 7).toordinal(),
+                datetime.date(2006, 12, 23).toordinal(),
+            ],
+        )
+        self.assertEqual(columns["BLN_FLD"], bytearray(b"\x01"))
+        self.assertEqual(
+            dbf.read_columns(fields=["CHR_FLD"], start=1), {"CHR_FLD": ["del"]}
+        )
+        self.assertEqual(
+            dbf.read_columns(fields=["CHR_FLD"], limit=1), {"CHR_FLD": ["test"]}
+        )
+        with self.assertRaises(ValueError):
+            dbf.read_columns(fields=["NO_FLD"])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    @testdata("simple.dbf")
+    def test_read_columns_datetime64(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        column = dbf.read_columns(fields=["DTE_FLD"], dates="datetime64")["DTE_FLD"]
+        self.assertEqual(column.dtype, numpy.dtype("datetime64[D]"))
+        self.assertEqual(list(column.astype(str)), ["2006-05-07", "2006-12-23"])
+
+    @testdata("simple.dbf")
+    def test_decoder(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        decode = dbf._getDecoder()
+        self.assertIs(decode, dbf._getDecoder(show_deleted=False))
+        raw = (b"*", b"  25", b"12.34", b"test  ", b"20060507", b"T")
+        reference_data = {
+            "INT_FLD": 25,
+            "FLT_FLD": decimal.Decimal("12.34"),
+            "CHR_FLD": "test",
+            "DTE_FLD": datetime.date(2006, 5, 7),
+            "BLN_FLD": True,
+        }
+        self.assertEqual(decode(raw), reference_data)
+        reference_data["_deletion_flag"] = "*"
+        self.assertEqual(dbf._getDecoder(show_deleted=True)(raw), reference_data)
+
+    @testdata("simple.dbf")
+    def test_conversion_error(self, fh):
+        def strict_dbf2date(val):
+            raise ValueError("wrong date %r" % val)
+
+        dbf = ydbf.YDbfReader(fh)
+        dbf.dbf2date = strict_dbf2date
+        with self.assertRaises(RuntimeError):
+            list(dbf)
+        with self.assertRaises(RuntimeError):
+            dbf[0]
+
+    @testdata("simple.dbf")
+    def test_truncated_file(self, fh):
+        # rec #2 is cut by the end of file
+        data = fh.read()[:-10]
+        for options in ({}, {"block_size": 30}, {"streaming": True}):
+            dbf = ydbf.YDbfReader(io.BytesIO(data), **options)
+            records = []
+            with self.assertRaisesRegex(RuntimeError, "rec #2"):
+                for rec in dbf.records(show_deleted=True):
+                    records.append(rec["INT_FLD"])
+            self.assertEqual(records, [25, 113])
+        dbf = ydbf.YDbfReader(io.BytesIO(data))
+        with self.assertRaisesRegex(RuntimeError, "rec #2"):
+            dbf.tail(1)
+        with self.assertRaisesRegex(RuntimeError, "rec #2"):
+            dbf.aggregate({"*": "count"})
+        with tempfile.NamedTemporaryFile(suffix=".dbf") as temp:
+            temp.write(data)
+            temp.flush()
+            with open(temp.name, "rb") as dbf_fh:
+                dbf = ydbf.YDbfReader(dbf_fh, use_mmap=True)
+                with self.assertRaisesRegex(RuntimeError, "rec #2"):
+                    list(dbf.records(show_deleted=True))
+                dbf.close()
+
+    @testdata("simple.dbf")
+    def test_where_conversion_error(self, fh):
+        data = bytearray(fh.read())
+        dbf = ydbf.YDbfReader(io.BytesIO(bytes(data)))
+        # FLT_FLD of rec #1 is malformed
+        offset = dbf.lenheader + dbf.recsize + 5
+        data[offset : offset + 5] = b"1x.01"
+        where = query.eq("FLT_FLD", 1.01)
+        for options in ({}, {"lazy": True}):
+            dbf = ydbf.YDbfReader(io.BytesIO(bytes(data)))
+            with self.assertRaisesRegex(RuntimeError, "rec #1"):
+                list(dbf.records(where=where, **options))
+        with self.assertRaisesRegex(RuntimeError, "rec #1"):
+            dbf.aggregate({"INT_FLD": "sum"}, where=where)
+
+    @testdata("simple.dbf")
+    def test_random_access(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        reference_data = list(dbf.records(show_deleted=True))
+        for rec in reference_data:
+            del rec["_deletion_flag"]
+        self.assertEqual(dbf[0], reference_data[0])
+        self.assertEqual(dbf[2], reference_data[2])
+        self.assertEqual(dbf[-1], reference_data[2])
+        self.assertEqual(dbf[1:], reference_data[1:])
+        self.assertEqual(dbf[::-2], reference_data[::-2])
+        with self.assertRaises(IndexError):
+            dbf[3]
+        self.assertEqual(dbf.get(1), reference_data[1])
+        # deleted record
+        self.assertEqual(dbf.get(2), None)
+        self.assertEqual(dbf.get(5, "missing"), "missing")
+
+    @testdata("simple.dbf")
+    def test_random_access_while_iterating(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        records = dbf.records()
+        first = next(records)
+        self.assertEqual(dbf[2]["INT_FLD"], 7436)
+        self.assertEqual([first] + list(records), list(dbf.records(start_from=0)))
+
+    @testdata("simple.dbf")
+    def test_numeric_mode(self, fh):
+        dbf = ydbf.YDbfReader(fh, numeric_mode="int")
+        self.assertEqual(
+            [rec["FLT_FLD"] for rec in dbf.records(fields=["FLT_FLD"])], [1234, 101]
+        )
+        self.assertEqual(list(dbf.read_columns(["FLT_FLD"])["FLT_FLD"]), [1234, 101])
+        dbf = ydbf.YDbfReader(fh, numeric_mode={"FLT_FLD": "float"})
+        self.assertEqual(
+            list(dbf.records(fields=["INT_FLD", "FLT_FLD"])),
+            [{"INT_FLD": 25, "FLT_FLD": 12.34}, {"INT_FLD": 113, "FLT_FLD": 1.01}],
+        )
+        with self.assertRaises(ValueError):
+            ydbf.YDbfReader(fh, numeric_mode="money")
+        with self.assertRaises(ValueError):
+            ydbf.YDbfReader(fh, numeric_mode={"NO_FLD": "int"})
+
+    @testdata("simple.dbf")
+    def test_cache(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        self.assertEqual(dbf.cache_info(), {})
+        reference_data = list(dbf.records())
+        dbf = ydbf.YDbfReader(fh, cache_size=16)
+        self.assertEqual(list(dbf.records()), reference_data)
+        self.assertEqual(list(dbf.records()), reference_data)
+        info = dbf.cache_info()
+        self.assertEqual(sorted(info), ["CHR_FLD", "DTE_FLD"])
+        self.assertEqual((info["DTE_FLD"].hits, info["DTE_FLD"].misses), (2, 2))
+        self.assertEqual(info["DTE_FLD"].maxsize, 16)
+        first, second = dbf.records(fields=["CHR_FLD"]), dbf.records(fields=["CHR_FLD"])
+        self.assertIs(next(first)["CHR_FLD"], next(second)["CHR_FLD"])
+        dbf = ydbf.YDbfReader(fh, cache_size={"CHR_FLD": 1})
+        self.assertEqual(list(dbf.cache_info()), ["CHR_FLD"])
+        with self.assertRaises(ValueError):
+            ydbf.YDbfReader(fh, cache_size={"NO_FLD": 1})
+
+    @testdata("simple.dbf")
+    def test_categorical(self, fh):
+        dbf = ydbf.YDbfReader(fh, categorical=["CHR_FLD"])
+        self.assertEqual(dbf.categories, {"CHR_FLD": []})
+        records = list(dbf.records(show_deleted=True))
+        self.assertEqual([rec["CHR_FLD"] for rec in records], [0, 1, 2])
+        self.assertEqual(dbf.categories, {"CHR_FLD": ["test", "del", "ex."]})
+        self.assertEqual(records[0]["INT_FLD"], 25)
+        column = dbf.read_columns(fields=["CHR_FLD"])["CHR_FLD"]
+        self.assertEqual(column.typecode, "q")
+        self.assertEqual(list(column), [0, 1])
+        with self.assertRaises(ValueError):
+            ydbf.YDbfReader(fh, categorical=["DTE_FLD"])
+        with self.assertRaises(ValueError):
+            ydbf.YDbfReader(fh, categorical=["NO_FLD"])
+
+    @testdata("simple.dbf")
+    def test_count_live(self, fh):
+        for options in ({}, {"block_size": 1}, {"use_mmap": True}):
+            dbf = ydbf.YDbfReader(fh, **options)
+            self.assertEqual(len(dbf), 3)
+            self.assertEqual(dbf.count_live(), 2)
+            self.assertEqual(dbf.deletion_bitmap(), bytearray(b"\x04"))
+
+    @testdata("simple.dbf")
+    def test_reverse(self, fh):
+        for options in ({}, {"block_size": 1}, {"use_mmap": True}):
+            dbf = ydbf.YDbfReader(fh, **options)
+            self.assertEqual(_int_values(dbf.records(reverse=True)), [113, 25])
+            self.assertEqual(
+                _int_values(dbf.records(reverse=True, show_deleted=True)),
+                [7436, 113, 25],
+            )
+            self.assertEqual(
+                _int_values(dbf.records(start_from=0, limit=2, reverse=True)),
+                [113, 25],
+            )
+            self.assertEqual(
+                _int_values(dbf.records(start_from=0, reverse=True, lazy=True)),
+                [113, 25],
+            )
+
+    @testdata("simple.dbf")
+    def test_tail(self, fh):
+        dbf = ydbf.YDbfReader(fh, block_size=1)
+        self.assertEqual(dbf.tail(0), [])
+        self.assertEqual(_int_values(dbf.tail(1)), [113])
+        self.assertEqual(_int_values(dbf.tail(5)), [25, 113])
+        self.assertEqual(
+            dbf.tail(1, fields=["INT_FLD"], show_deleted=True),
+            [{"_deletion_flag": "*", "INT_FLD": 7436}],
+        )
+        self.assertEqual(list(dbf.tail(2, row_type="tuple")[0])[:1], [25])
+
+    @testdata("simple.dbf")
+    def test_streaming(self, fh):
+        data = fh.read()
+        reference_data = list(ydbf.YDbfReader(fh).records(show_deleted=True))
+        dbf = ydbf.YDbfReader(_Stream(data))
+        self.assertTrue(dbf.streaming)
+        self.assertEqual(list(dbf.records(show_deleted=True)), reference_data)
+        with self.assertRaises(io.UnsupportedOperation):
+            list(dbf.records())
+        dbf = ydbf.YDbfReader(_Stream(data), block_size=1)
+        self.assertEqual(_int_values(dbf.records(start_from=1)), [113])
+        for operation in (
+            lambda dbf: dbf[0],
+            lambda dbf: list(dbf.records(reverse=True)),
+            lambda dbf: dbf.tail(1),
+        ):
+            with self.assertRaises(io.UnsupportedOperation):
+                operation(ydbf.YDbfReader(_Stream(data)))
+        self.assertEqual(ydbf.YDbfReader(_Stream(data)).count_live(), 2)
+        dbf = ydbf.YDbfReader(io.BytesIO(data), streaming=True)
+        self.assertEqual(_int_values(dbf.records()), [25, 113])
+        with self.assertRaises(ValueError):
+            ydbf.YDbfReader(_Stream(data), use_mmap=True)
+
+    @testdata("simple.dbf")
+    def test_stats(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        self.assertIsNone(dbf.stats)
+        reference_data = list(dbf.records())
+        collected = []
+        dbf = ydbf.YDbfReader(fh, stats_callback=collected.append)
+        self.assertEqual(list(dbf.records()), reference_data)
+        self.assertEqual(collected, [dbf.stats])
+        info = dbf.stats.as_dict()
+        self.assertEqual(
+            (info["records"], info["deleted"], info["bytes"]), (2, 1, 3 * dbf.recsize)
+        )
+        self.assertEqual(sorted(info["converter_time"]), ["C", "D", "L", "N"])
+        self.assertGreater(info["elapsed"], 0)
+        self.assertGreater(info["records_per_second"], 0)
+        shared = ydbf_stats.Stats()
+        dbf = ydbf.YDbfReader(fh, stats=shared)
+        list(dbf.records(lazy=True))
+        list(dbf.records(fields=["INT_FLD"]))
+        self.assertIs(dbf.stats, shared)
+        self.assertEqual((shared.records, shared.deleted), (4, 2))
+
+    @testdata("simple.dbf")
+    def test_mmap_requires_file(self, fh):
+        with self.assertRaises(ValueError):
+            ydbf.YDbfReader(io.BytesIO(fh.read()), use_mmap=True)
+
 
 class TestReaderConverters(unittest.TestCase):
     @testdata("simple.dbf")
@@ -299,6 +802,11 @@ class TestReaderConverters(unittest.TestCase):
         self.assertEqual(conv(b"12.34"), decimal.Decimal("12.34"))
         with self.assertRaises(ValueError):
             conv(b"foo")
+        # too many digits for float
+        self.assertEqual(
+            self.dbf.converters["FLT_FLD"](b"1234567890123456.78", 19, 2),
+            decimal.Decimal("1234567890123456.78"),
+        )
 
     def test_char_unicode(self):
         conv = self._getConv("CHR_FLD")
@@ -349,6 +857,842 @@ class TestReaderNonunicodeConverters(unittest.TestCase):
         self.assertEqual(conv(b"\xf2\xe5\xf1\xf2"), b"\xf2\xe5\xf1\xf2")
 
 
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestArrays(unittest.TestCase):
+    def setUp(self):
+        self.dbf = ydbf.YDbfReader(
+            open(os.path.join(_TEST_DATA_DIR, "simple.dbf"), "rb")
+        )
+
+    def tearDown(self):
+        self.dbf.close()
+
+    def test_to_numpy_raw(self):
+        raw = self.dbf.to_numpy_raw()
+        self.assertEqual(len(raw), 3)
+        self.assertEqual(raw.dtype.names, tuple(n for n, t, s, d in self.dbf._fields))
+        self.assertEqual(list(raw["CHR_FLD"]), [b"test  ", b"del   ", b"ex.   "])
+        self.assertEqual(list(arrays.live(raw)), [True, True, False])
+        # view over mapping, not a copy
+        self.assertFalse(raw.flags.writeable)
+        self.assertFalse(raw.flags.owndata)
+
+    def test_numerals(self):
+        column = numpy.array([b"  25", b"    ", b"-3  ", b"12\x00\x00"], "S4")
+        result = arrays.numerals(column)
+        self.assertEqual(result.dtype, numpy.int64)
+        self.assertEqual(list(result), [25, 0, -3, 12])
+        column = numpy.array([b"12.34", b"     ", b" 0.50"], "S5")
+        self.assertEqual(list(arrays.numerals(column, 2)), [12.34, 0.0, 0.5])
+
+    def test_dates(self):
+        column = numpy.array(
+            [
+                b"20060507",
+                b"        ",
+                b"18990302",
+                b"2006 507",
+                b"20060231",
+                b"20040229",
+                b"00000101",
+            ]
+        )
+        result = arrays.dates(column)
+        self.assertEqual(result.dtype, numpy.dtype("datetime64[D]"))
+        self.assertEqual(
+            list(result.astype(str)),
+            ["2006-05-07", "NaT", "1899-03-02", "NaT", "NaT", "2004-02-29", "NaT"],
+        )
+        # reader doesn't accept such dates either
+        self.assertRaises(ValueError, lib.dbf2date, b"20060231")
+
+    def test_logicals(self):
+        column = numpy.array([b"T", b"t", b"Y", b"y", b"F", b"N", b" ", b"?"])
+        self.assertEqual(
+            list(arrays.logicals(column)),
+            [True, True, True, True, False, False, False, False],
+        )
+
+    def test_convert(self):
+        raw = self.dbf.to_numpy_raw()
+        live = raw[arrays.live(raw)]
+        columns = arrays.convert(self.dbf, live, fields=["INT_FLD", "DTE_FLD"])
+        self.assertEqual(list(columns), ["INT_FLD", "DTE_FLD"])
+        self.assertEqual(columns["INT_FLD"].sum(), 138)
+        self.assertEqual(
+            list(columns["DTE_FLD"].astype(str)), ["2006-05-07", "2006-12-23"]
+        )
+
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.dbf_read_path = os.path.join(_TEST_DATA_DIR, "simple.dbf")
+
+    def test_partition(self):
+        self.assertEqual(parallel.partition(10, 3), [(0, 4), (4, 3), (7, 3)])
+        self.assertEqual(parallel.partition(2, 4), [(0, 1), (1, 1)])
+        self.assertEqual(parallel.partition(0, 4), [(0, 0)])
+
+    def test_scan(self):
+        self.assertEqual(
+            parallel.scan(self.dbf_read_path, _int_values, workers=2, chunks=3),
+            [[25], [113], []],
+        )
+        self.assertEqual(
+            parallel.scan(
+                self.dbf_read_path,
+                _int_values,
+                workers=1,
+                reduce=operator.add,
+                show_deleted=True,
+            ),
+            [25, 113, 7436],
+        )
+        self.assertEqual(
+            parallel.scan(
+                self.dbf_read_path,
+                _int_values,
+                workers=2,
+                reduce=operator.add,
+                fields=["INT_FLD"],
+                where=query.between("INT_FLD", 100, None),
+                reader_options={"use_mmap": True},
+            ),
+            [113],
+        )
+
+    def test_aggregate(self):
+        spec = {"INT_FLD": ("sum", "max"), "FLT_FLD": "avg", "*": "count"}
+        expected = {"INT_FLD": (138, 113), "FLT_FLD": decimal.Decimal("6.675"), "*": 2}
+        self.assertEqual(
+            parallel.aggregate(self.dbf_read_path, spec, workers=2, chunks=3), expected
+        )
+        self.assertEqual(
+            parallel.aggregate(self.dbf_read_path, spec, workers=1), expected
+        )
+        self.assertEqual(
+            parallel.aggregate(
+                self.dbf_read_path,
+                {"FLT_FLD": "sum"},
+                workers=2,
+                where=query.eq("CHR_FLD", "del"),
+                reader_options={"numeric_mode": "int"},
+            ),
+            {"FLT_FLD": 101},
+        )
+
+
+class TestAggregate(unittest.TestCase):
+    @testdata("simple.dbf")
+    def test_aggregate(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        self.assertEqual(
+            dbf.aggregate(
+                {
+                    "INT_FLD": ("sum", "min", "max", "avg"),
+                    "FLT_FLD": ("sum", "min", "count"),
+                    "*": "count",
+                }
+            ),
+            {
+                "INT_FLD": (138, 25, 113, 69.0),
+                "FLT_FLD": (decimal.Decimal("13.35"), decimal.Decimal("1.01"), 2),
+                "*": 2,
+            },
+        )
+
+    @testdata("simple.dbf")
+    def test_numeric_mode(self, fh):
+        dbf = ydbf.YDbfReader(fh, numeric_mode="int")
+        self.assertEqual(
+            dbf.aggregate({"FLT_FLD": ("sum", "avg")}), {"FLT_FLD": (1335, 667.5)}
+        )
+        dbf = ydbf.YDbfReader(fh, numeric_mode="float")
+        result = dbf.aggregate({"FLT_FLD": ("sum", "max", "avg")})
+        self.assertEqual(result, {"FLT_FLD": (13.35, 12.34, 6.675)})
+
+    @testdata("simple.dbf")
+    def test_range(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        self.assertEqual(
+            dbf.aggregate({"INT_FLD": "sum"}, where=query.eq("CHR_FLD", "test")),
+            {"INT_FLD": 25},
+        )
+        self.assertEqual(
+            dbf.aggregate({"INT_FLD": "sum", "*": "count"}, start_from=1, limit=5),
+            {"INT_FLD": 113, "*": 1},
+        )
+        self.assertEqual(
+            dbf.aggregate({"INT_FLD": ("sum", "min", "avg"), "*": "count"}, limit=0),
+            {"INT_FLD": (0, None, None), "*": 0},
+        )
+
+    @testdata("simple.dbf")
+    def test_column_parser(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        parse = aggregate.column_parser(dbf, "FLT_FLD")
+        self.assertEqual(parse([b"12.34", b"-0.50"]), [1234, -50])
+        self.assertEqual(
+            parse([b"12.34", b"  1.5", b"     ", b"-0.50"]), [1234, 150, 0, -50]
+        )
+        self.assertEqual(parse([b"12.34", b"12.3 "]), [1234, 1230])
+        self.assertEqual(parse([b"  .50", b"-1.50"]), [50, -150])
+        parse = aggregate.column_parser(dbf, "INT_FLD")
+        self.assertEqual(parse([b"  25", b"-113"]), [25, -113])
+        self.assertEqual(parse([b"  25", b"    "]), [25, 0])
+
+    @testdata("simple.dbf")
+    def test_errors(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        self.assertRaises(ValueError, dbf.aggregate, {"CHR_FLD": "max"})
+        self.assertRaises(ValueError, dbf.aggregate, {"INT_FLD": "median"})
+        self.assertRaises(ValueError, dbf.aggregate, {"*": "sum"})
+        self.assertRaises(ValueError, dbf.aggregate, {"NO_FLD": "sum"})
+
+
+class TestGroupBy(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dbf_path = os.path.join(self.temp_dir, "sales.dbf")
+        fields = [
+            ("REGION", ydbf.CHAR, 5, 0),
+            ("DAY", ydbf.DATE, 8, 0),
+            ("AMOUNT", ydbf.NUMERAL, 8, 2),
+        ]
+        self.data = [
+            {
+                "REGION": "r%d" % (i % 7),
+                "DAY": datetime.date(2021, 1, 1 + i % 2),
+                "AMOUNT": decimal.Decimal(i) / 4,
+            }
+            for i in range(100)
+        ]
+        with ydbf.open(self.dbf_path, ydbf.WRITE, fields) as dbf:
+            dbf.write(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _expected(self):
+        groups = {}
+        for rec in self.data:
+            key = (rec["REGION"], rec["DAY"])
+            total, count, high = groups.get(key, (0, 0, None))
+            high = rec["AMOUNT"] if high is None else max(high, rec["AMOUNT"])
+            groups[key] = (total + rec["AMOUNT"], count + 1, high)
+        return dict(
+            (key, {"AMOUNT": (total, high), "*": count})
+            for key, (total, count, high) in groups.items()
+        )
+
+    def test_group_by(self):
+        aggs = {"AMOUNT": ("sum", "max"), "*": "count"}
+        with ydbf.open(self.dbf_path) as dbf:
+            groups = list(query.group_by(dbf, ["REGION", "DAY"], aggs))
+        self.assertEqual(len(groups), 14)
+        self.assertEqual(groups[0][0], ("r0", datetime.date(2021, 1, 1)))
+        self.assertEqual(dict(groups), self._expected())
+
+    def test_spill(self):
+        aggs = {"AMOUNT": ("sum", "max"), "*": "count"}
+        with ydbf.open(self.dbf_path, block_size=200) as dbf:
+            groups = list(
+                query.group_by(
+                    dbf, ["REGION", "DAY"], aggs, max_groups=3, spill_dir=self.temp_dir
+                )
+            )
+        self.assertEqual(len(groups), 14)
+        self.assertEqual(dict(groups), self._expected())
+        # spill files are removed
+        self.assertEqual(os.listdir(self.temp_dir), ["sales.dbf"])
+
+    def test_raw_spellings(self):
+        path = os.path.join(self.temp_dir, "spellings.dbf")
+        fields = [
+            ("CODE", ydbf.CHAR, 4, 0),
+            ("RATE", ydbf.NUMERAL, 5, 2),
+            ("FLAG", ydbf.LOGICAL, 1, 0),
+            ("QTY", ydbf.NUMERAL, 3, 0),
+        ]
+        with ydbf.open(path, ydbf.WRITE, fields) as dbf:
+            dbf.write([{"CODE": "", "RATE": 0, "FLAG": False, "QTY": 0}] * 4)
+        with ydbf.open(path) as dbf:
+            lenheader = dbf.lenheader
+        with open(path, "r+b") as fh:
+            fh.seek(lenheader)
+            fh.write(b" ab\x00\x00  .50F  1")
+            fh.write(b" ab   0.50?  2")
+            fh.write(b" ab   0.50   3")
+            fh.write(b" cd   0.50T  4")
+        with ydbf.open(path) as dbf:
+            groups = list(query.group_by(dbf, ["CODE", "RATE", "FLAG"], {"QTY": "sum"}))
+        self.assertEqual(
+            groups,
+            [
+                (("ab", decimal.Decimal("0.50"), False), {"QTY": 6}),
+                (("cd", decimal.Decimal("0.50"), True), {"QTY": 4}),
+            ],
+        )
+
+    @testdata("simple.dbf")
+    def test_simple(self, fh):
+        dbf = ydbf.YDbfReader(fh)
+        self.assertEqual(
+            list(query.group_by(dbf, "BLN_FLD", {"INT_FLD": "sum", "*": "count"})),
+            [((True,), {"INT_FLD": 25, "*": 1}), ((False,), {"INT_FLD": 113, "*": 1})],
+        )
+        self.assertEqual(
+            list(query.group_by(dbf, ["CHR_FLD"], {"*": "count"})),
+            [(("test",), {"*": 1}), (("del",), {"*": 1})],
+        )
+        self.assertEqual(
+            list(
+                query.group_by(
+                    dbf, [], {"FLT_FLD": "sum"}, where=query.between("INT_FLD", 100)
+                )
+            ),
+            [((), {"FLT_FLD": decimal.Decimal("1.01")})],
+        )
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dbf_path = os.path.join(self.temp_dir, "simple.dbf")
+        shutil.copy(os.path.join(_TEST_DATA_DIR, "simple.dbf"), self.dbf_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_build(self):
+        index_file = index.build(self.dbf_path, "INT_FLD")
+        self.assertEqual(index_file, self.dbf_path + ".INT_FLD.ydx")
+        idx = index.Index(index_file)
+        # deleted record is not indexed
+        self.assertEqual((idx.field, idx.count, idx.numrec), ("INT_FLD", 2, 3))
+        self.assertEqual(list(idx.recnos()), [0, 1])
+        idx.close()
+
+    def test_lookup(self):
+        for field in ("INT_FLD", "FLT_FLD", "CHR_FLD", "DTE_FLD", "BLN_FLD"):
+            index.build(self.dbf_path, field)
+        with ydbf.open(self.dbf_path) as dbf:
+            self.assertEqual(_int_values(dbf.lookup("INT_FLD", 113)), [113])
+            self.assertEqual(dbf.lookup("INT_FLD", 7436), [])
+            self.assertEqual(_int_values(dbf.lookup("FLT_FLD", 12.34)), [25])
+            self.assertEqual(dbf.lookup("FLT_FLD", "12.345"), [])
+            self.assertEqual(_int_values(dbf.lookup("CHR_FLD", "del")), [113])
+            self.assertEqual(
+                _int_values(dbf.lookup("DTE_FLD", datetime.date(2006, 5, 7))), [25]
+            )
+            self.assertEqual(_int_values(dbf.lookup("BLN_FLD", False)), [113])
+            with self.assertRaises(ValueError):
+                dbf.lookup("INT_FLD", 1, index_file=self.dbf_path + ".FLT_FLD.ydx")
+
+    def test_range(self):
+        index.build(self.dbf_path, "FLT_FLD")
+        index.build(self.dbf_path, "CHR_FLD")
+        with ydbf.open(self.dbf_path) as dbf:
+            self.assertEqual(_int_values(dbf.range("FLT_FLD")), [113, 25])
+            self.assertEqual(_int_values(dbf.range("FLT_FLD", 1.005, 12.34)), [113, 25])
+            self.assertEqual(_int_values(dbf.range("FLT_FLD", "1.015")), [25])
+            self.assertEqual(_int_values(dbf.range("FLT_FLD", None, "12.339")), [113])
+            self.assertEqual(_int_values(dbf.range("CHR_FLD", "d", "e")), [113])
+            self.assertEqual(_int_values(dbf.range("CHR_FLD", "tes")), [25])
+
+    def test_stale_index(self):
+        index.build(self.dbf_path, "INT_FLD")
+        fields = [("INT_FLD", "N", 4, 0)]
+        with ydbf.open(self.dbf_path, "w", fields) as dbf:
+            dbf.write([{"INT_FLD": 1}])
+        with ydbf.open(self.dbf_path) as dbf:
+            with self.assertRaises(ValueError):
+                dbf.lookup("INT_FLD", 1)
+        with open(self.dbf_path, "rb") as fh:
+            data = fh.read()
+        with ydbf.open(io.BytesIO(data)) as dbf:
+            with self.assertRaises(ValueError):
+                dbf.lookup("INT_FLD", 1)
+
+    def test_deleted_after_build(self):
+        index.build(self.dbf_path, "INT_FLD")
+        with open(self.dbf_path, "r+b") as fh:
+            with ydbf.open(self.dbf_path) as dbf:
+                offset = dbf.lenheader + dbf.recsize
+            # delete the second record (113)
+            fh.seek(offset)
+            fh.write(b"*")
+        with ydbf.open(self.dbf_path) as dbf:
+            self.assertEqual(dbf.lookup("INT_FLD", 113), [])
+            self.assertEqual(_int_values(dbf.range("INT_FLD")), [25])
+
+
+def _ndx_page(entries, item_size, last_child=0):
+    """
+    Make NDX page of (child, recno, key) entries
+    """
+    page = struct.pack("<I", len(entries))
+    for child, recno, key in entries:
+        page += struct.pack("<II", child, recno) + key.ljust(item_size - 8, b"\x00")
+    page += struct.pack("<I", last_child)
+    return page.ljust(native_index.NDX_PAGE_SIZE, b"\x00")
+
+
+def _cdx_leaf(entries, key_length, pad):
+    """
+    Make CDX leaf node of (key, recno) entries (the only node of level)
+    """
+    info = b""
+    keys = b""
+    previous = b""
+    for key, recno in entries:
+        dup = 0
+        while dup < len(previous) and key[dup] == previous[dup]:
+            dup += 1
+        trail = len(key) - len(key.rstrip(pad))
+        info += (recno | dup << 16 | trail << 20).to_bytes(3, "little")
+        keys = key[dup : key_length - trail] + keys
+        previous = key
+    node = struct.pack(native_index.CDX_NODE_FORMAT, 3, len(entries), -1, -1)
+    node += struct.pack(native_index.CDX_LEAF_FORMAT, 0, 0xFFFF, 0xF, 0xF, 16, 4, 4, 3)
+    node += info
+    return node + keys.rjust(native_index.CDX_NODE_SIZE - len(node), b"\x00")
+
+
+def _cdx_header(root, key_length, options, expression):
+    header = struct.pack(
+        native_index.CDX_HEADER_FORMAT, root, -1, key_length, options, 1
+    )
+    header = header.ljust(510, b"\x00") + struct.pack("<H", len(expression))
+    return (header + expression).ljust(1024, b"\x00")
+
+
+class TestNativeIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dbf_read_path = os.path.join(_TEST_DATA_DIR, "simple.dbf")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+    def test_ndx(self):
+        header = struct.pack(native_index.NDX_HEADER_FORMAT, 1, 4, 8, 31, 1, 16, 0)
+        header = (header + b"INT_FLD").ljust(native_index.NDX_PAGE_SIZE, b"\x00")
+        double = lambda value: struct.pack("<d", value)
+        path = self._write(
+            "simple.ndx",
+            header
+            + _ndx_page([(2, 0, double(25))], 16, last_child=3)
+            + _ndx_page([(0, 1, double(25))], 16)
+            + _ndx_page([(0, 2, double(113)), (0, 3, double(7436))], 16),
+        )
+        with native_index.open_index(path) as idx, ydbf.open(self.dbf_read_path) as dbf:
+            self.assertEqual(idx.expression, "INT_FLD")
+            self.assertEqual(list(idx.items()), [(25, 0), (113, 1), (7436, 2)])
+            self.assertEqual(list(idx.recnos(idx.key(100))), [1, 2])
+            self.assertEqual(_int_values(dbf.records_by_index(idx)), [25, 113])
+            self.assertEqual(_int_values(dbf.records_by_index(idx, 26, 7436)), [113])
+            self.assertEqual(_int_values(dbf.records_by_index(idx, None, 25)), [25])
+
+    def test_mdx(self):
+        header = struct.pack(
+            native_index.MDX_HEADER_FORMAT,
+            2,
+            121,
+            1,
+            1,
+            b"SIMPLE",
+            2,
+            1024,
+            1,
+            48,
+            32,
+            1,
+        )
+        header = header.ljust(native_index.MDX_TAGS_OFFSET, b"\x00")
+        tag = struct.pack(native_index.MDX_TAG_FORMAT, 2, b"CHR_FLD", 0x10, b"C")
+        tag_header = struct.pack(
+            native_index.MDX_TAG_HEADER_FORMAT, 3, 5, 0, b"C", 6, 84, 0, 12, 0
+        )
+        block = struct.pack("<II", 3, 0)
+        for recno, key in ((2, b"del   "), (3, b"ex.   "), (1, b"test  ")):
+            block += struct.pack("<I", recno) + key.ljust(8, b"\x00")
+        path = self._write(
+            "simple.mdx",
+            tag.join([header, b""]).ljust(1024, b"\x00")
+            + (tag_header + b"CHR_FLD").ljust(512, b"\x00")
+            + block.ljust(1024, b"\x00"),
+        )
+        with native_index.open_index(path) as idx, ydbf.open(self.dbf_read_path) as dbf:
+            self.assertEqual(idx.dbf_name, "SIMPLE")
+            self.assertEqual(list(idx.tags), ["CHR_FLD"])
+            tag = idx.tags["CHR_FLD"]
+            self.assertEqual(list(tag.recnos()), [1, 2, 0])
+            self.assertEqual(_int_values(dbf.records_by_index(tag)), [113, 25])
+            self.assertEqual(_int_values(dbf.records_by_index(tag, "e", "z")), [25])
+
+    def test_bcd(self):
+        self.assertEqual(
+            native_index._bcd2decimal(b"\x36\x10\x12\x34" + b"\x00" * 8),
+            decimal.Decimal("12.34"),
+        )
+        self.assertEqual(
+            native_index._bcd2decimal(b"\x33\x84\x50" + b"\x00" * 9),
+            decimal.Decimal("-0.05"),
+        )
+        self.assertEqual(native_index._bcd2decimal(b"\x34" + b"\x00" * 11), 0)
+
+    def test_cdx(self):
+        keys = [
+            (native_index._cdx_double(value), recno)
+            for value, recno in ((25, 1), (113, 2), (7436, 3))
+        ]
+        data = (
+            _cdx_header(1024, 10, 0xE0, b"")
+            + _cdx_leaf([(b"INT_FLD   ", 1536)], 10, b" ")
+            + _cdx_header(2560, 8, 0x60, b"INT_FLD")
+            + _cdx_leaf(keys, 8, b"\x00")
+        )
+        path = self._write("simple.cdx", data)
+        with ydbf.open(self.dbf_read_path) as dbf:
+            with native_index.open_index(path, dbf) as idx:
+                tag = idx.tags["INT_FLD"]
+                self.assertEqual(tag.expression, "INT_FLD")
+                self.assertEqual(list(tag.recnos()), [0, 1, 2])
+                self.assertEqual(_int_values(dbf.records_by_index(tag, 100)), [113])
+                self.assertEqual(_int_values(dbf.records_by_index(tag, 25, 25)), [25])
+        self.assertLess(native_index._cdx_double(-1.5), native_index._cdx_double(-1))
+        self.assertLess(native_index._cdx_double(-1), native_index._cdx_double(0.5))
+
+    def test_production_index(self):
+        dbf_path = self._write("simple.dbf", b"")
+        self.assertIsNone(native_index.production_index(dbf_path))
+        mdx_path = self._write("simple.mdx", b"")
+        self.assertEqual(native_index.production_index(dbf_path), mdx_path)
+        with self.assertRaises(ValueError):
+            native_index.open_index(dbf_path)
+        with ydbf.open(self.dbf_read_path) as dbf:
+            self.assertFalse(dbf.has_index)
+
+
+class TestMemo(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+    def _write_dbf(self, name, sig, blocks):
+        """
+        Write DBF with fields ID and NOTE (memo), `blocks` are numbers
+        of blocks of NOTE
+        """
+        fields = [("ID", "N", 3, 0), ("NOTE", "C", 10, 0)]
+        fh = io.BytesIO()
+        with ydbf.YDbfWriter(fh, fields, encoding="cp1251") as dbf:
+            dbf.fh.close = lambda: None
+            dbf.write(
+                {"ID": i, "NOTE": str(block or "")} for i, block in enumerate(blocks)
+            )
+        data = bytearray(fh.getvalue())
+        data[0] = sig
+        data[32 + 32 + 11 : 32 + 32 + 12] = b"M"
+        return self._write(name, bytes(data))
+
+    def _notes(self, path, **options):
+        with ydbf.open(path, **options) as dbf:
+            return [rec["NOTE"] and rec["NOTE"].read() for rec in dbf]
+
+    def test_dbt3(self):
+        path = self._write_dbf("notes.dbf", 0x83, [1, 0, 2])
+        long_note = "долгая заметка " * 40
+        self._write(
+            "notes.dbt",
+            b"\x04".ljust(512, b"\x00")
+            + b"first\r\nnote\x1a\x1a".ljust(512, b"\x00")
+            + (long_note.encode("cp1251") + b"\x1a\x1a").ljust(1024, b"\x00"),
+        )
+        self.assertEqual(self._notes(path), ["first\r\nnote", None, long_note])
+
+    def test_dbt4(self):
+        path = self._write_dbf("notes.dbf", 0x8B, [1])
+        header = b"\x02".ljust(20, b"\x00") + struct.pack("<H", 64)
+        block = b"\xff\xff\x08\x00" + struct.pack("<I", 8 + 100) + b"y" * 100
+        self._write("notes.dbt", header.ljust(64, b"\x00") + block.ljust(128, b"\x00"))
+        self.assertEqual(self._notes(path), ["y" * 100])
+
+    def test_fpt(self):
+        path = self._write_dbf("notes.dbf", 0xF5, [8, 9])
+        header = struct.pack(">I2xH", 10, 64).ljust(512, b"\x00")
+        text = struct.pack(">II", memo.FPT_TEXT, 4) + "тест".encode("cp1251")
+        picture = struct.pack(">II", memo.FPT_PICTURE, 3) + b"\x89PN"
+        self._write("notes.FPT", header + text.ljust(64, b"\x00") + picture)
+        self.assertEqual(self._notes(path), ["тест", b"\x89PN"])
+
+    def test_lazy(self):
+        path = self._write_dbf("notes.dbf", 0x83, [1, 1])
+        self._write(
+            "notes.dbt",
+            b"\x02".ljust(512, b"\x00") + b"shared\x1a\x1a".ljust(512, b"\x00"),
+        )
+        with ydbf.open(path, memo_cache_size=1) as dbf:
+            notes = [rec["NOTE"] for rec in dbf]
+            # memo file isn't opened until memo is read
+            self.assertIsNone(dbf.memo.fh)
+            self.assertEqual(repr(notes[0]), "Memo(block=1)")
+            self.assertEqual([str(note) for note in notes], ["shared", "shared"])
+            info = dbf.memo.cache_info()
+            self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_memo_file_option(self):
+        path = self._write_dbf("notes.dbf", 0x83, [1])
+        memo_path = self._write(
+            "other.txt",
+            b"\x02".ljust(512, b"\x00") + b"note\x1a\x1a".ljust(512, b"\x00"),
+        )
+        self.assertEqual(self._notes(path, memo_file=memo_path), ["note"])
+        with open(memo_path, "rb") as fh:
+            self.assertEqual(self._notes(path, memo_file=fh), ["note"])
+
+    def test_no_memo_file(self):
+        path = self._write_dbf("notes.dbf", 0x83, [1, 0])
+        with ydbf.open(path) as dbf:
+            notes = [rec["NOTE"] for rec in dbf]
+        self.assertIsNone(notes[1])
+        self.assertRaises(ValueError, notes[0].read)
+
+
+def _vfp_dbf(fields, records):
+    """
+    Make Visual FoxPro table of (NAME, TYPE, SIZE, DECIMAL, FLAGS) `fields`
+    and raw `records` (bytes with deletion flag)
+    """
+    lenheader = 32 + 32 * len(fields) + 1 + 263
+    recsize = 1 + sum(field[2] for field in fields)
+    header = struct.pack(
+        lib.HEADER_FORMAT, 0x30, 121, 1, 1, len(records), lenheader, recsize, 0xC9
+    )
+    for name, typ, size, dec, flags in fields:
+        header += struct.pack("<11sc4xBBB13x", name, typ, size, dec, flags)
+    header += b"\x0d" + b"\x00" * 263
+    return header + b"".join(records) + b"\x1a"
+
+
+class TestVisualFoxPro(unittest.TestCase):
+    def setUp(self):
+        stamp = datetime.datetime(2021, 3, 4, 5, 6, 7, 250000)
+        stamp = struct.pack(
+            "<ii", stamp.toordinal() + 1721425, (5 * 3600 + 6 * 60 + 7) * 1000 + 250
+        )
+        fields = [
+            (b"ID", b"I", 4, 0, 0),
+            (b"PRICE", b"Y", 8, 4, 0),
+            (b"RATE", b"B", 8, 2, 0),
+            (b"STAMP", b"T", 8, 0, 0),
+            (b"NOTE", b"M", 4, 0, 0),
+            (b"SCORE", b"F", 6, 2, 0),
+            (b"NAME", b"C", 5, 0, 0x02),
+            (b"_NullFlags", b"0", 1, 0, 0x05),
+        ]
+        records = [
+            b" "
+            + struct.pack("<iqd", 1, 123456, 0.5)
+            + stamp
+            + b"\x00" * 4
+            + b" 12.50"
+            + "ёж".encode("cp1251").ljust(5)
+            + b"\x00",
+            b" "
+            + struct.pack("<iqd", 256, -10000, 256.0)
+            + b"\x00" * 12
+            + b"  0.00"
+            + b"\x00" * 5
+            + b"\x01",
+            b"*"
+            + struct.pack("<iqd", -3, 0, -1.0)
+            + b"\x00" * 12
+            + b"  1.00"
+            + b"del  "
+            + b"\x00",
+        ]
+        self.data = _vfp_dbf(fields, records)
+        self.dbf = ydbf.YDbfReader(io.BytesIO(self.data))
+        self.first = {
+            "ID": 1,
+            "PRICE": decimal.Decimal("12.3456"),
+            "RATE": 0.5,
+            "STAMP": datetime.datetime(2021, 3, 4, 5, 6, 7, 250000),
+            "NOTE": None,
+            "SCORE": decimal.Decimal("12.50"),
+            "NAME": "ёж",
+            "_NullFlags": 0,
+        }
+        self.second = {
+            "ID": 256,
+            "PRICE": decimal.Decimal("-1.0000"),
+            "RATE": 256.0,
+            "STAMP": None,
+            "NOTE": None,
+            "SCORE": decimal.Decimal("0.00"),
+            "NAME": None,
+            "_NullFlags": 1,
+        }
+
+    def test_header(self):
+        self.assertEqual(self.dbf.numfields, 8)
+        self.assertEqual(self.dbf.recsize, 45)
+        self.assertTrue(self.dbf.recfmt.startswith("<"))
+        self.assertEqual(self.dbf.null_bits, {"NAME": 0})
+        self.assertFalse(self.dbf.has_index)
+        data = bytearray(self.data)
+        # table with memo, but without structural index
+        data[lib.INDEX_FLAG_OFFSET] = 0x02
+        self.assertFalse(ydbf.YDbfReader(io.BytesIO(bytes(data))).has_index)
+        data[lib.INDEX_FLAG_OFFSET] = 0x03
+        self.assertTrue(ydbf.YDbfReader(io.BytesIO(bytes(data))).has_index)
+
+    def test_records(self):
+        self.assertEqual(list(self.dbf.records()), [self.first, self.second])
+        self.assertEqual(
+            [dict(rec) for rec in self.dbf.records(lazy=True)],
+            [self.first, self.second],
+        )
+        self.assertEqual(self.dbf[2]["ID"], -3)
+        self.assertEqual(
+            list(self.dbf.records(fields=["NAME"], row_type="tuple")),
+            [("ёж",), (None,)],
+        )
+        self.assertEqual(
+            [rec["NAME"] for rec in self.dbf.records(fields=["NAME"], lazy=True)],
+            ["ёж", None],
+        )
+
+    def test_projection(self):
+        dbf = self.dbf
+        dbf.numeric_mode = "int"
+        dbf._makeActions()
+        self.assertEqual(
+            list(dbf.records(fields=["PRICE", "STAMP"], row_type="tuple")),
+            [(123456, self.first["STAMP"]), (-10000, None)],
+        )
+        self.assertEqual(
+            [rec["PRICE"] for rec in dbf.records(fields=["PRICE"], lazy=True)],
+            [123456, -10000],
+        )
+
+    def test_where(self):
+        self.assertEqual(_ids(self.dbf.records(where=query.eq("ID", 256))), [256])
+        self.assertEqual(
+            _ids(self.dbf.records(where=query.between("PRICE", 0, "12.3456"))), [1]
+        )
+        self.assertEqual(
+            _ids(self.dbf.records(where=query.isin("RATE", [0.5, 256]))), [1, 256]
+        )
+
+    def test_read_columns(self):
+        columns = self.dbf.read_columns(["ID", "PRICE", "RATE", "STAMP"])
+        self.assertEqual(columns["ID"], array.array("q", [1, 256]))
+        self.assertEqual(columns["RATE"], array.array("d", [0.5, 256.0]))
+        self.assertEqual(columns["PRICE"], [self.first["PRICE"], self.second["PRICE"]])
+        self.assertEqual(columns["STAMP"], [self.first["STAMP"], None])
+        self.assertEqual(self.dbf.read_columns(["NAME"]), {"NAME": ["ёж", None]})
+
+    def test_read_columns_stats(self):
+        dbf = ydbf.YDbfReader(io.BytesIO(self.data), numeric_mode="int", stats=True)
+        columns = dbf.read_columns(["ID", "PRICE", "RATE"])
+        self.assertEqual(columns["ID"], array.array("q", [1, 256]))
+        self.assertEqual(columns["PRICE"], array.array("q", [123456, -10000]))
+        self.assertEqual(columns["RATE"], array.array("d", [0.5, 256.0]))
+        self.assertEqual(
+            list(dbf.records(fields=["ID", "PRICE"], row_type="tuple")),
+            [(1, 123456), (256, -10000)],
+        )
+
+    def test_aggregate(self):
+        self.assertEqual(
+            self.dbf.aggregate(
+                {"ID": ("sum", "min"), "PRICE": "sum", "RATE": "max", "SCORE": "sum"}
+            ),
+            {
+                "ID": (257, 1),
+                "PRICE": decimal.Decimal("11.3456"),
+                "RATE": 256.0,
+                "SCORE": decimal.Decimal("12.50"),
+            },
+        )
+
+
+class TestNullValues(unittest.TestCase):
+    def setUp(self):
+        fields = [
+            (b"ID", b"I", 4, 0, 0x02),
+            (b"AMT", b"N", 6, 2, 0x02),
+            (b"NAME", b"C", 5, 0, 0x02),
+            (b"_NullFlags", b"0", 1, 0, 0x05),
+        ]
+        records = [
+            b" " + struct.pack("<i", 2) + b"  1.50" + b"ab   " + b"\x00",
+            b" " + struct.pack("<i", 3) + b"  2.00" + b"     " + b"\x00",
+            # all values are null
+            b" " + struct.pack("<i", 0) + b"      " + b"     " + b"\x07",
+        ]
+        _, self.dbf_path = tempfile.mkstemp(suffix=".dbf")
+        with open(self.dbf_path, "wb") as fh:
+            fh.write(_vfp_dbf(fields, records))
+        self.dbf = ydbf.YDbfReader(open(self.dbf_path, "rb"))
+
+    def tearDown(self):
+        self.dbf.close()
+        os.unlink(self.dbf_path)
+
+    def test_where(self):
+        dbf = self.dbf
+        self.assertEqual(_ids(dbf.records(where=query.eq("ID", 0))), [])
+        self.assertEqual(_ids(dbf.records(where=query.eq("NAME", ""))), [3])
+        self.assertEqual(
+            _ids(dbf.records(where=query.between("AMT", None, 2), lazy=True)), [2, 3]
+        )
+        self.assertEqual(
+            list(dbf.records(fields=["AMT"], where=query.isin("NAME", ["", "ab"]))),
+            [{"AMT": decimal.Decimal("1.50")}, {"AMT": decimal.Decimal("2.00")}],
+        )
+
+    def test_aggregate(self):
+        spec = {"ID": ("count", "min", "sum"), "AMT": ("sum", "avg"), "*": "count"}
+        expected = {
+            "ID": (2, 2, 5),
+            "AMT": (decimal.Decimal("3.50"), decimal.Decimal("1.75")),
+            "*": 3,
+        }
+        self.assertEqual(self.dbf.aggregate(spec), expected)
+        self.assertEqual(
+            parallel.aggregate(self.dbf_path, spec, workers=1, chunks=2), expected
+        )
+
+    def test_group_by(self):
+        groups = list(query.group_by(self.dbf, ["NAME"], {"ID": ("count", "sum")}))
+        self.assertEqual(
+            groups,
+            [
+                (("ab",), {"ID": (1, 2)}),
+                (("",), {"ID": (1, 3)}),
+                ((None,), {"ID": (0, 0)}),
+            ],
+        )
+
+
 class TestYdbfWriter(unittest.TestCase):
     def setUp(self):
         self.dbf_reference_data = b"\x03j\x06\x13\x03\x00\x00\x00\xc1\x00\x19\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00INT_FLD\x00\x00\x00\x00N\x00\x00\x00\x00\x04\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00FLT_FLD\x00\x00\x00\x00N\x00\x00\x00\x00\x05\x02\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00CHR_FLD\x00\x00\x00\x00C\x00\x00\x00\x00\x06\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00DTE_FLD\x00\x00\x00\x00D\x00\x00\x00\x00\x08\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00BLN_FLD\x00\x00\x00\x00L\x00\x00\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\r   2512.34test  20060507T  113 1.01del   20061223F 7436 0.50ex.   20060715T\x1a"
@@ -406,6 +1750,18 @@ class TestYdbfWriter(unittest.TestCase):
         data = self.fh.read()
         self.assertEqual(data, self.dbf_reference_data)
 
+    def test_stats(self):
+        collected = []
+        dbf = ydbf.YDbfWriter(
+            io.BytesIO(), self.fields, stats_callback=collected.append
+        )
+        dbf.write(self.reference_data)
+        self.assertEqual(collected, [dbf.stats])
+        self.assertEqual(dbf.stats.records, 3)
+        self.assertEqual(dbf.stats.bytes, 75)
+        self.assertEqual(sorted(dbf.stats.converter_time), ["C", "D", "L", "N"])
+        self.assertIsNone(self.dbf.stats)
+
     def test_wrongtype(self):
         fields = (
             ("INT_FLD", "N", 4, 0),
@@ -462,6 +1818,63 @@ class TestOpen(unittest.TestCase):
         bytes_dbf = ydbf.open(self.dbf_read_path, use_unicode=False)
         self.assertFalse(bytes_dbf.encoding)
 
+    def test_open_compressed(self):
+        records = [{"ID": 1, "VALUE": "One"}, {"ID": 2, "VALUE": "Two"}]
+        for suffix, compression in (
+            (".dbf.gz", "gzip"),
+            (".dbf.bz2", "bz2"),
+            (".dbf.xz", "xz"),
+            (".dbf.zip", "zip"),
+        ):
+            filepath = self.dbf_temp_path + suffix
+            try:
+                with ydbf.open(filepath, "w", self.fields) as dbf:
+                    dbf.write(records)
+                self.assertEqual(ydbf_compression.detect(filepath), compression)
+                with ydbf.open(filepath) as dbf:
+                    self.assertTrue(dbf.streaming)
+                    self.assertEqual(list(dbf.records()), records)
+            finally:
+                os.unlink(filepath)
+        name = os.path.basename(self.dbf_temp_path)
+        for filepath, member in (
+            (self.dbf_temp_path + ".zip", name),
+            (self.dbf_temp_path[:-4] + ".zip", name),
+        ):
+            try:
+                with ydbf.open(filepath, "w", self.fields) as dbf:
+                    dbf.write(records)
+                with zipfile.ZipFile(filepath) as archive:
+                    self.assertEqual(archive.namelist(), [member])
+            finally:
+                os.unlink(filepath)
+
+    @mock.patch("ydbf.compression._ZIP_STREAMING", False)
+    def test_open_compressed_zip_without_streaming(self):
+        records = [{"ID": 1, "VALUE": "One"}, {"ID": 2, "VALUE": "Two"}]
+        filepath = self.dbf_temp_path + ".zip"
+        try:
+            with ydbf.open(filepath, "w", self.fields) as dbf:
+                dbf.write(records)
+            with ydbf.open(filepath) as dbf:
+                self.assertEqual(list(dbf.records()), records)
+        finally:
+            os.unlink(filepath)
+
+    def test_open_compressed_filehandler(self):
+        fh = io.BytesIO()
+        with ydbf.open(fh, "w", self.fields, compression="gzip") as dbf:
+            dbf.write([{"ID": 1, "VALUE": "One"}])
+        self.assertEqual(fh.getvalue()[:2], b"\x1f\x8b")
+        fh.seek(0)
+        dbf = ydbf.open(fh, compression="gzip")
+        self.assertEqual(list(dbf.records()), [{"ID": 1, "VALUE": "One"}])
+        with open(self.dbf_read_path, "rb") as fh:
+            self.assertIsNone(ydbf_compression.detect(self.dbf_read_path))
+            self.assertFalse(ydbf.open(fh).streaming)
+        with self.assertRaises(ValueError):
+            ydbf.open(self.dbf_read_path, compression="rar")
+
     def test_open_doesnt_close_file(self):
         dbf = ydbf.open(self.dbf_temp_path, "w", self.fields)
         dbf.write([{"ID": 1, "VALUE": "One"}])
@@ -493,6 +1906,29 @@ class TestYdbfDump(unittest.TestCase):
             data = output.read()
         self.assertIn("25:12.34:test:2006-05-07:True", data)
 
+    def test_fields(self):
+        args = [
+            "-o",
+            self.output_temp_path,
+            "-F",
+            "chr_fld,int_fld",
+            self.dbf_read_path,
+        ]
+        dump.dump(args)
+        with open(self.output_temp_path) as output:
+            data = output.read()
+        self.assertEqual(data, "test:25\ndel:113\n")
+
+    def test_stdin(self):
+        with open(self.dbf_read_path, "rb") as fh:
+            stdin = io.TextIOWrapper(io.BufferedReader(_Stream(fh.read())))
+        args = ["-o", self.output_temp_path, "-"]
+        with mock.patch("sys.stdin", stdin):
+            dump.dump(args)
+        with open(self.output_temp_path) as output:
+            data = output.read()
+        self.assertIn("25:12.34:test:2006-05-07:True", data)
+
     def test_table_format(self):
         args = ["-o", self.output_temp_path, "-t", self.dbf_read_path]
         dump.dump(args)
@@ -10,8 +10,10 @@ DBF writer
 
 import struct
 import datetime
+import time
 
 from ydbf import lib
+from ydbf import stats as ydbf_stats
 
 
 class YDbfWriter(object):
@@ -19,7 +21,15 @@ class YDbfWriter(object):
     Writes DBF from iterator
     """
 
-    def __init__(self, fh, fields, use_unicode=True, encoding="ascii"):
+    def __init__(
+        self,
+        fh,
+        fields,
+        use_unicode=True,
+        encoding="ascii",
+        stats=None,
+        stats_callback=None,
+    ):
         """
         Creates DBF writer
 
@@ -44,11 +54,21 @@ class YDbfWriter(object):
                 use unicode (recommended), then unicode data will be encoded
                 by this encoding, else data will be written as is.
                 Default is 'ascii', which means 0x00 lang code.
+            `stats`:
+                collect statistics of `write` (see `ydbf.stats`): True or
+                `ydbf.stats.Stats` instance. Statistics are available as
+                `stats` attribute, elapsed time includes time of getting
+                records from iterator. Default is None (no statistics).
+            `stats_callback`:
+                function which gets statistics each time `write` is done,
+                turns statistics on. Default is None.
         """
         self.fh = fh
         self.fields = fields
         self.encoding = encoding
         self.use_unicode = use_unicode
+        self.stats = ydbf_stats.make_stats(stats, stats_callback)
+        self.stats_callback = stats_callback
 
         self.now = datetime.date.today()
         self.numrec = 0
@@ -134,6 +154,10 @@ class YDbfWriter(object):
                     "Cannot find python-to-dbf converter "
                     "for field %s (type %s)" % (name, typ)
                 )
+            if self.stats is not None:
+                self.converters[name] = ydbf_stats.timed_converter(
+                    self.stats, typ, self.converters[name]
+                )
 
     def _writeHeader(self):
         """
@@ -185,6 +209,9 @@ class YDbfWriter(object):
             `records`:
                 iterator over records (each record is a dict of values)
         """
+        stats = self.stats
+        if stats is not None:
+            started = time.perf_counter()
         i = 0
         for rec in records:
             i += 1
@@ -235,6 +262,9 @@ class YDbfWriter(object):
             # first empty symbol is a deletion flag
             self.fh.write(b" " + raw_rec)
             self.numrec = i
+            if stats is not None:
+                stats.records += 1
+                stats.bytes += self.recsize
             if divmod(i, 1000)[1] == 0:
                 # each 1k records flush header
                 self.flush()
@@ -242,6 +272,10 @@ class YDbfWriter(object):
         # End of file
         self.fh.write(b"\x1A")
         self.fh.flush()
+        if stats is not None:
+            stats.elapsed += time.perf_counter() - started
+            if self.stats_callback is not None:
+                self.stats_callback(stats)
 
     def __enter__(self):
         return self